@@ -4,34 +4,936 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, SessionNotCreatedException
 from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.common.keys import Keys
 from webdriver_manager.chrome import ChromeDriverManager
+from requests.adapters import HTTPAdapter
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+from collections import Counter, OrderedDict, deque
+import argparse
+import contextlib
+import functools
+import glob
+import hashlib
+import heapq
+import io
+import random
+import threading
 import time
 import os
 import json
+import multiprocessing
+import queue
 import re
 import shutil
+import signal
+import sqlite3
 import subprocess
 import sys
+import tempfile
 import requests
 
-def fix_chromedriver_issues():
-    """Fix common ChromeDriver issues"""
-    print("🔧 Checking and fixing ChromeDriver issues...")
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Contacts to scrape when no --contacts/--contacts-file is given
+CONTACT_NAMES = []  # CHANGE THIS to names you want
+
+# Resolved chromedriver path and Chrome version, reused between runs
+DRIVER_MANIFEST_PATH = os.path.join(os.getcwd(), "driver-manifest.json")
+WDM_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".wdm")
+
+# Browser profiles: "default" is the full headed browser, "lean" runs
+# headless with images/media/fonts blocked and small caches
+CHROME_PROFILES = ("default", "lean")
+CHROME_DATA_DIR = os.path.join(os.getcwd(), "chrome-data")
+# URL patterns the lean profile blocks through CDP
+LEAN_BLOCKED_URLS = [
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg", "*.opus", "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*mmg.whatsapp.net*", "*pps.whatsapp.net*", "*media*.whatsapp.net*",
+]
+# Cache folders inside chrome-data that can be deleted without losing the login
+PROFILE_TRIM_DIRS = [
+    "Default/Cache", "Default/Code Cache", "Default/GPUCache", "Default/Media Cache",
+    "GrShaderCache", "ShaderCache", "GraphiteDawnCache", "Crashpad",
+]
+
+# Google Form URL and field IDs
+FORM_URL = os.environ.get("COMPLAINT_FORM_URL", "")  # add your .../formResponse URL
+FORM_FIELDS = {
+    "name": "",  # add your entry.XXXX id for the name question
+    "phone": "",  # add your entry.XXXX id for the phone question
+    "message": "",  # add your entry.XXXX id for the complaint question
+}
+
+# Background form submission: worker threads, max queued submissions,
+# retries on 429/5xx and the base of the jittered exponential backoff
+SUBMIT_WORKERS = 4
+SUBMIT_QUEUE_SIZE = 100
+SUBMIT_MAX_RETRIES = 4
+SUBMIT_BACKOFF_SECONDS = 1.0
+SUBMIT_TIMEOUT = 30
+
+# Append-only complaint outbox: segmented JSONL files, fsynced in batches
+OUTBOX_DIR = os.path.join(os.getcwd(), "outbox")
+OUTBOX_SEGMENT_RECORDS = 1000
+OUTBOX_FSYNC_EVERY = 20
+OUTBOX_FSYNC_SECONDS = 1.0
+# Failed complaints are replayed until they reach this many attempts
+OUTBOX_MAX_ATTEMPTS = 5
+
+# Near-duplicate detection: index snapshot, per-contact time window, size cap
+# and the SimHash Hamming distance that still counts as the same complaint
+DEDUP_INDEX_PATH = os.path.join(os.getcwd(), "dedup-index.json")
+DEDUP_WINDOW_HOURS = 72
+DEDUP_MAX_ENTRIES = 50000
+DEDUP_SIMHASH_DISTANCE = 7
+DEDUP_ENABLED = True
+
+# LLM fallback for complaint field extraction (same model as the n8n workflow)
+LLM_API_URL = "https://openrouter.ai/api/v1/chat/completions"
+LLM_MODEL = os.environ.get("COMPLAINT_LLM_MODEL", "deepseek/deepseek-chat:free")
+LLM_API_KEY = os.environ.get("OPENROUTER_API_KEY", "")
+LLM_TIMEOUT = 60
+# Local extraction results below this confidence are sent to the LLM
+LOCAL_EXTRACT_MIN_CONFIDENCE = 0.6
+# LLM stage: cached results (by normalized message), micro-batches of up to
+# LLM_BATCH_SIZE messages collected for LLM_BATCH_WAIT_SECONDS, parallel calls
+LLM_CACHE_SIZE = 2048
+LLM_CACHE_TTL_SECONDS = 24 * 3600
+LLM_BATCH_SIZE = 8
+LLM_BATCH_WAIT_SECONDS = 0.2
+LLM_MAX_CONCURRENT_CALLS = 4
+# Use MockLLMModel instead of OpenRouter (--mock-llm)
+LLM_MOCK = False
+
+# Contact -> chat location index, kept next to chrome-data
+CHAT_INDEX_PATH = os.path.join(os.getcwd(), "chat-index.json")
+# Index entries older than this are treated as stale
+CHAT_INDEX_MAX_AGE_DAYS = 30
+
+# SQLite history of every queued complaint (query it with --query)
+COMPLAINT_DB_PATH = os.path.join(os.getcwd(), "complaints.db")
+# Queued writes are committed together, up to this many or after this long
+COMPLAINT_DB_BATCH_SIZE = 200
+COMPLAINT_DB_FLUSH_SECONDS = 1.0
+
+# Local complaint feed (--ingest-port) for n8n and other consumers: batches
+# via cursor-based pulls, or NDJSON / Server-Sent Events streams
+INGEST_HOST = "127.0.0.1"
+INGEST_FEED_PATH = os.path.join(os.getcwd(), "ingest-feed.jsonl")
+# Consumer name -> last acknowledged sequence number
+INGEST_CURSORS_PATH = os.path.join(os.getcwd(), "ingest-cursors.json")
+# Records kept for consumers that fall behind
+INGEST_FEED_MAX_RECORDS = 10000
+INGEST_BATCH_SIZE = 100
+INGEST_MAX_BATCH_SIZE = 1000
+INGEST_MAX_WAIT_SECONDS = 30
+INGEST_HEARTBEAT_SECONDS = 15
+
+# Chat identity -> resolved phone number, so the contact info panel is
+# opened once per contact instead of once per complaint
+CONTACT_CACHE_PATH = os.path.join(os.getcwd(), "contact-cache.json")
+CONTACT_CACHE_TTL_DAYS = 30
+# Contacts whose number could not be found are retried after this long
+CONTACT_CACHE_MISS_TTL_HOURS = 24
+
+# Unread-first scheduling (--unread): chats are opened by a score built from
+# their unread count, how long their newest message has waited and whether
+# they sent a complaint in the last SCHEDULER_COMPLAINANT_DAYS days
+SCHEDULER_UNREAD_WEIGHT = 1.0
+SCHEDULER_UNREAD_CAP = 10
+SCHEDULER_AGE_WEIGHT_PER_HOUR = 0.5
+SCHEDULER_AGE_CAP_HOURS = 24
+SCHEDULER_COMPLAINANT_BONUS = 5.0
+SCHEDULER_COMPLAINANT_DAYS = 90
+# Chat list pages scanned for unread badges; the scan also stops once a page's
+# rows were all last active more than SCHEDULER_SCAN_MAX_AGE_DAYS ago
+SCHEDULER_MAX_PAGES = 20
+SCHEDULER_SCAN_MAX_AGE_DAYS = 7
+
+# Per-chat high-water marks and seen message ids for watch mode
+WATCH_STATE_PATH = os.path.join(os.getcwd(), "watch-state.json")
+# Message ids remembered per chat for de-duplication
+WATCH_SEEN_IDS = 500
+
+# Page the browser opens (--fake-whatsapp points it at a local fixture)
+WHATSAPP_URL = "https://web.whatsapp.com"
+
+# Multi-account runs (--accounts): one worker process per account, each with
+# its own chrome-data, outbox and indexes under ACCOUNTS_DIR/<name>
+ACCOUNTS_DIR = os.path.join(os.getcwd(), "accounts")
+# Merged stream of every worker's events, one JSON object per line
+SHARD_RESULTS_PATH = os.path.join(os.getcwd(), "shard-results.jsonl")
+# How often a worker that dies is started again before its contacts are failed
+SHARD_MAX_RESTARTS = 3
+
+# Unattended service mode (--daemon): seconds between scrape cycles. Chrome is
+# restarted on the same chrome-data (no new QR login) after this many chats
+# or once the browser's resident memory passes this many MB
+DAEMON_INTERVAL_SECONDS = 300
+DAEMON_RECYCLE_OPERATIONS = 500
+DAEMON_RECYCLE_RSS_MB = 1500
+# Status written after every cycle and served on --health-port; the daemon
+# is unhealthy once no cycle has succeeded for this many intervals
+DAEMON_HEALTH_PATH = os.path.join(os.getcwd(), "daemon-health.json")
+DAEMON_HEALTH_HOST = "127.0.0.1"
+DAEMON_STALE_INTERVALS = 3
+
+# Scraper benchmark (--bench-scraper) results are checked against this baseline
+BENCH_BASELINE_PATH = os.path.join(os.getcwd(), "bench-baseline.json")
+# Chat list sizes of the fake WhatsApp page measured by default
+BENCH_SIZES = (10, 100, 1000, 5000)
+# A case regresses when its median grows by more than this fraction (plus
+# the slack, so millisecond cases don't trip on noise) or it needs more
+# WebDriver calls by the same fraction
+BENCH_REGRESSION_TOLERANCE = 0.25
+BENCH_MIN_SLACK_SECONDS = 0.05
+
+# Latency budget (seconds) for each wait phase; override with --wait-budget phase=seconds
+WAIT_BUDGETS = {
+    "whatsapp_load": 10,
+    "chat_list": 5,
+    "chat_scroll": 3,
+    "element_stable": 1,
+    "conversation": 5,
+    "messages": 5,
+}
+# How long the DOM must stay unchanged to count as settled (milliseconds)
+DOM_QUIET_MS = 300
+# Seconds actually spent in each wait phase (the latest WAIT_TIMINGS_KEEP per phase)
+WAIT_TIMINGS = {}
+WAIT_TIMINGS_KEEP = 1000
+
+# Timing spans per phase, fallback/retry counters and latency histograms;
+# off unless --metrics-file (JSON lines) or --metrics-port (Prometheus) is given
+METRICS_PREFIX = "complaint"
+METRICS_HOST = "127.0.0.1"
+METRICS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Chat row selectors, tried in order inside a single scripted snapshot
+CHAT_ROW_SELECTORS = [
+    "div[aria-label='Chat list'] > div > div",
+    "#pane-side div[role='listitem']",
+    "div[data-testid='chat-list'] div[role='listitem']",
+    "div#pane-side > div > div > div > div",
+    "div[role='row']"
+]
+# Present once the chat list is there / while the login QR code is shown
+CHAT_LIST_READY_SELECTORS = [
+    "[data-testid='chat-list']",
+    "div[aria-label='Chat list']",
+    "#pane-side [role='listitem']",
+    "#side",
+]
+QR_CODE_SELECTORS = ["[data-testid='qr-code']", "canvas[aria-label*='Scan']", "div[data-ref] canvas"]
+CHAT_CONTAINER_SELECTORS = ["#pane-side", "div[aria-label='Chat list']", "div[data-testid='chat-list']"]
+CONVERSATION_SELECTORS = [
+    "div[data-testid='conversation-panel-body']",
+    "div[data-testid='msg-container']",
+    "div#main",
+    "footer[data-testid='compose-panel']",
+]
+CONTACT_NAME_SELECTORS = [
+    "header span[title]",
+    "header div[title]",
+    "div[data-testid='conversation-info-header'] span",
+]
+
+# Conversation header and the contact info panel it opens (phone lookup)
+CONTACT_HEADER_SELECTORS = [
+    "header[data-testid='conversation-info-header']",
+    "#main header [role='button']",
+    "#main header",
+]
+CONTACT_DRAWER_SELECTORS = [
+    "[data-testid='contact-info-drawer']",
+    "[data-testid='chat-info-drawer']",
+    "div[data-testid='drawer-right']",
+]
+CONTACT_DRAWER_TIMEOUT = 5
+
+# Learned selector order per target (see SelectorResolver)
+SELECTOR_STATS_PATH = os.path.join(os.getcwd(), "selector-stats.json")
+# A selector that matched nothing this many times while another one worked is tried last
+SELECTOR_DEMOTE_AFTER = 3
+SELECTOR_POLL_SECONDS = 0.25
+# Element lookups go through the resolver's explicit waits; a non-zero
+# implicit wait would be paid again by every find_element that misses
+IMPLICIT_WAIT_SECONDS = 0
+
+# Returns {selector, rows, scroll_top} for the first selector in arguments[0]
+# that matches any rows; every row carries its index, title, preview, unread
+# count, full text, data-id, offset inside #pane-side and the element itself
+# so no per-row WebDriver calls are needed
+CHAT_LIST_SNAPSHOT_JS = """
+var selectors = arguments[0];
+var pane = document.querySelector('#pane-side');
+var paneTop = pane ? pane.getBoundingClientRect().top : 0;
+var scrollTop = pane ? pane.scrollTop : 0;
+function clean(text) { return (text || '').replace(/\\s+/g, ' ').trim(); }
+// Last-activity label of a row: "10:32", "10:32 PM", "Yesterday", a weekday or a date
+var TIME_LABEL = /^(\\d{1,2}[:.]\\d{2}(\\s?[ap]\\.?m\\.?)?|yesterday|today|monday|tuesday|wednesday|thursday|friday|saturday|sunday|\\d{1,2}[\\/.-]\\d{1,2}[\\/.-]\\d{2,4})$/i;
+for (var s = 0; s < selectors.length; s++) {
+    var nodes = document.querySelectorAll(selectors[s]);
+    if (!nodes.length) { continue; }
+    var rows = [];
+    for (var i = 0; i < nodes.length; i++) {
+        var node = nodes[i];
+        var titled = node.querySelectorAll('span[title]');
+        var lines = (node.innerText || '').split('\\n').map(clean).filter(Boolean);
+        var title = titled.length ? titled[0].getAttribute('title') : (lines[0] || '');
+        var preview = titled.length > 1 ? titled[titled.length - 1].getAttribute('title') : (lines[lines.length - 1] || '');
+        var unread = 0;
+        var badge = node.querySelector("[aria-label*='unread']");
+        if (badge) {
+            var count = (badge.getAttribute('aria-label') || '').match(/\\d+/);
+            unread = count ? parseInt(count[0], 10) : 1;
+        }
+        var time = null;
+        for (var k = 0; k < lines.length; k++) {
+            if (lines[k] !== clean(title) && TIME_LABEL.test(lines[k])) { time = lines[k]; break; }
+        }
+        var idNode = node.matches('[data-id]') ? node : node.querySelector('[data-id]');
+        rows.push({index: i, title: clean(title), preview: clean(preview), unread: unread, time: time,
+                   text: clean(lines.join(' ')), chat_id: idNode ? idNode.getAttribute('data-id') : null,
+                   offset: Math.round(node.getBoundingClientRect().top - paneTop + scrollTop), element: node});
+    }
+    return {selector: selectors[s], rows: rows, scroll_top: scrollTop};
+}
+return {selector: null, rows: [], scroll_top: scrollTop};
+"""
+
+# Shared JS helpers turning a message row (an element with data-id inside
+# #main, or one of the older container selectors) into
+# {id, sender, timestamp, text, incoming}
+MESSAGE_RECORD_JS = """
+var MESSAGE_ROW_SELECTORS = ['#main [data-id]', "div[data-testid='msg-container']",
+                             'div.message-in, div.message-out', "div[role='row']"];
+function messageRows(root) {
+    for (var s = 0; s < MESSAGE_ROW_SELECTORS.length; s++) {
+        var selector = MESSAGE_ROW_SELECTORS[s];
+        var nodes = Array.prototype.filter.call((root || document).querySelectorAll(selector), function (node) {
+            return !(node.parentElement && node.parentElement.closest(selector));
+        });
+        if (nodes.length) { return nodes; }
+    }
+    return [];
+}
+function messageRecord(row) {
+    var copyable = row.querySelector('[data-pre-plain-text]');
+    var meta = copyable ? copyable.getAttribute('data-pre-plain-text') : '';
+    // data-pre-plain-text looks like "[10:32, 16/10/2026] Ali Khan: "
+    var match = (meta || '').match(/^\\[([^\\]]+)\\]\\s*(.*?):\\s*$/);
+    var spans = row.querySelectorAll('span.selectable-text');
+    var text = Array.prototype.map.call(spans, function (span) { return (span.innerText || '').trim(); })
+        .filter(Boolean).join(' ');
+    var id = row.getAttribute('data-id') || '';
+    return {
+        id: id,
+        sender: match ? match[2] : '',
+        timestamp: match ? match[1] : '',
+        text: text || (row.innerText || '').trim(),
+        incoming: id.indexOf('false_') === 0 || !!row.querySelector('.message-in')
+    };
+}
+"""
+
+# Every message currently rendered in the open chat, oldest first
+EXTRACT_MESSAGES_JS = MESSAGE_RECORD_JS + """
+return messageRows(document).map(messageRecord);
+"""
+
+# Messages after id arguments[0] (all if null/not rendered), optionally only
+# incoming ones (arguments[1]) and only the last arguments[2]
+EXTRACT_MESSAGES_SINCE_JS = MESSAGE_RECORD_JS + """
+var sinceId = arguments[0], incomingOnly = arguments[1], last = arguments[2];
+var records = messageRows(document).map(messageRecord);
+if (sinceId) {
+    for (var i = records.length - 1; i >= 0; i--) {
+        if (records[i].id === sinceId) { records = records.slice(i + 1); break; }
+    }
+}
+if (incomingOnly) { records = records.filter(function (record) { return record.incoming; }); }
+records = records.filter(function (record) { return record.text; });
+return last ? records.slice(-last) : records;
+"""
+
+# Installs a MutationObserver that queues every new message row in the page
+INSTALL_MESSAGE_OBSERVER_JS = MESSAGE_RECORD_JS + """
+if (window.__complaintWatch) { window.__complaintWatch.observer.disconnect(); }
+var watch = {queue: [], waiter: null};
+watch.observer = new MutationObserver(function (mutations) {
+    mutations.forEach(function (mutation) {
+        mutation.addedNodes.forEach(function (node) {
+            if (node.nodeType !== 1 || !node.closest('#main') && !node.querySelector('#main')) { return; }
+            var rows = node.matches('[data-id]') ? [node] : messageRows(node);
+            rows.forEach(function (row) { watch.queue.push(messageRecord(row)); });
+        });
+    });
+    if (watch.queue.length && watch.waiter) { var waiter = watch.waiter; watch.waiter = null; waiter(); }
+});
+watch.observer.observe(document.body, {childList: true, subtree: true});
+window.__complaintWatch = watch;
+return true;
+"""
+
+# Long-polls the observer queue: returns queued records as soon as there are
+# any (after a short batching delay) or [] after arguments[0] ms; null means
+# the page was reloaded and the observer has to be installed again
+DRAIN_MESSAGE_QUEUE_JS = """
+var maxWait = arguments[0], batchMs = arguments[1], done = arguments[arguments.length - 1];
+var watch = window.__complaintWatch;
+if (!watch) { done(null); return; }
+function flush() { var batch = watch.queue; watch.queue = []; done(batch); }
+if (watch.queue.length) { flush(); return; }
+var timer = setTimeout(function () { watch.waiter = null; flush(); }, maxWait);
+watch.waiter = function () { clearTimeout(timer); setTimeout(flush, batchMs); };
+"""
+
+# Match counts for every selector in arguments[0] and up to arguments[1]
+# elements of the first one that matches anything
+PROBE_SELECTORS_JS = """
+var selectors = arguments[0], limit = arguments[1] || 50;
+var counts = [], winner = -1, elements = [];
+for (var i = 0; i < selectors.length; i++) {
+    var nodes = [];
+    try { nodes = document.querySelectorAll(selectors[i]); } catch (e) {}
+    counts.push(nodes.length);
+    if (winner < 0 && nodes.length) {
+        winner = i;
+        elements = Array.prototype.slice.call(nodes, 0, limit);
+    }
+}
+return {counts: counts, winner: winner, elements: elements};
+"""
+
+# WhatsApp id of the open chat (e.g. 923001234567@c.us) taken from the
+# newest message's data-id ("false_<chat id>_<message id>"), or null
+CHAT_IDENTITY_JS = """
+var rows = document.querySelectorAll('#main [data-id]');
+for (var i = rows.length - 1; i >= 0; i--) {
+    var match = (rows[i].getAttribute('data-id') || '').match(/^(?:true|false)_([^_]+@[^_]+)_/);
+    if (match) { return match[1]; }
+}
+return null;
+"""
+
+# Centers #pane-side on offset arguments[0]; returns the new scrollTop
+SCROLL_CHAT_LIST_TO_JS = """
+var pane = document.querySelector('#pane-side');
+if (!pane) { return null; }
+pane.scrollTop = Math.max(0, arguments[0] - pane.clientHeight / 2);
+return pane.scrollTop;
+"""
+
+# Resolves once the subtree under arguments[0] has had no mutations for
+# arguments[1] ms, or with false when the arguments[2] ms budget runs out
+DOM_QUIET_JS = """
+var selector = arguments[0], quietMs = arguments[1], timeoutMs = arguments[2];
+var done = arguments[arguments.length - 1];
+var root = (selector && document.querySelector(selector)) || document.body;
+var start = performance.now(), last = start;
+var observer = new MutationObserver(function () { last = performance.now(); });
+observer.observe(root, {childList: true, subtree: true, attributes: true, characterData: true});
+function check() {
+    var now = performance.now();
+    if (now - last >= quietMs || now - start >= timeoutMs) {
+        observer.disconnect();
+        done(now - last >= quietMs);
+        return;
+    }
+    schedule();
+}
+function schedule() {
+    // requestAnimationFrame is paused in background tabs, fall back to timers there
+    if (document.visibilityState === 'visible') { requestAnimationFrame(check); } else { setTimeout(check, 50); }
+}
+schedule();
+"""
+
+# Resolves once the element's bounding box is unchanged for arguments[1]
+# consecutive frames, or with false after arguments[2] ms
+ELEMENT_STABLE_JS = """
+var el = arguments[0], stableFrames = arguments[1], timeoutMs = arguments[2];
+var done = arguments[arguments.length - 1];
+var start = performance.now(), last = null, stable = 0;
+function check() {
+    if (!el || !el.isConnected) { done(false); return; }
+    var r = el.getBoundingClientRect();
+    var key = [r.top, r.left, r.width, r.height].join(',');
+    stable = key === last ? stable + 1 : 0;
+    last = key;
+    if (stable >= stableFrames) { done(true); return; }
+    if (performance.now() - start >= timeoutMs) { done(false); return; }
+    if (document.visibilityState === 'visible') { requestAnimationFrame(check); } else { setTimeout(check, 16); }
+}
+check();
+"""
+
+def get_chrome_version():
+    """Read the installed Chrome version without starting the browser"""
+    if sys.platform.startswith("win"):
+        commands = [
+            ["reg", "query", r"HKEY_CURRENT_USER\Software\Google\Chrome\BLBeacon", "/v", "version"],
+            ["reg", "query", r"HKEY_LOCAL_MACHINE\Software\Google\Chrome\BLBeacon", "/v", "version"],
+        ]
+    elif sys.platform == "darwin":
+        commands = [["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome", "--version"]]
+    else:
+        commands = [[name, "--version"] for name in ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser")]
     
-    # Clear ChromeDriver cache
+    for command in commands:
+        try:
+            output = subprocess.run(command, capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = re.search(r"\d+\.\d+\.\d+\.\d+", output)
+        if match:
+            return match.group(0)
+    return None
+
+def load_driver_manifest():
+    """Load the cached chromedriver manifest (empty dict if missing or broken)"""
+    try:
+        with open(DRIVER_MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_driver_manifest(manifest):
+    """Write the chromedriver manifest atomically"""
     try:
-        cache_path = os.path.join(os.path.expanduser("~"), ".wdm")
-        if os.path.exists(cache_path):
+        tmp_path = DRIVER_MANIFEST_PATH + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, DRIVER_MANIFEST_PATH)
+    except OSError as e:
+        print(f"⚠️ Could not save driver manifest: {e}")
+
+def clear_chromedriver_cache():
+    """Delete the downloaded chromedrivers and the manifest pointing at them"""
+    try:
+        if os.path.exists(WDM_CACHE_PATH):
             print("🗑️ Clearing ChromeDriver cache...")
-            import shutil
-            shutil.rmtree(cache_path)
+            shutil.rmtree(WDM_CACHE_PATH)
             print("✅ Cache cleared successfully")
+        if os.path.exists(DRIVER_MANIFEST_PATH):
+            os.remove(DRIVER_MANIFEST_PATH)
     except Exception as e:
         print(f"⚠️ Could not clear cache: {e}")
 
-def get_optimized_chrome_options():
+def resolve_chromedriver(force_refresh=False):
+    """Return (chromedriver_path, warm) reusing the cached binary while Chrome's major version matches"""
+    chrome_version = get_chrome_version()
+    manifest = load_driver_manifest()
+    cached_path = manifest.get("chromedriver_path")
+    
+    if not force_refresh and cached_path and os.path.exists(cached_path):
+        cached_major = (manifest.get("chrome_version") or "").split(".")[0]
+        # Unknown Chrome version (e.g. detection failed) still trusts the cache so offline starts work
+        if chrome_version is None or chrome_version.split(".")[0] == cached_major:
+            print(f"♻️ Reusing cached ChromeDriver: {cached_path}")
+            return cached_path, True
+        print(f"🔄 Chrome changed ({manifest.get('chrome_version')} -> {chrome_version}), resolving new ChromeDriver...")
+    
+    chromedriver_path = ChromeDriverManager().install()
+    manifest.update({
+        "chrome_version": chrome_version or manifest.get("chrome_version"),
+        "chromedriver_path": chromedriver_path,
+        "resolved_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    })
+    save_driver_manifest(manifest)
+    return chromedriver_path, False
+
+def is_version_mismatch(error):
+    """True if driver creation failed because chromedriver and Chrome versions differ"""
+    message = str(error).lower()
+    return isinstance(error, SessionNotCreatedException) and (
+        "only supports chrome version" in message or "this version of chromedriver" in message
+    )
+
+def record_driver_start_time(seconds, warm):
+    """Remember the latest cold/warm start time and print both for comparison"""
+    manifest = load_driver_manifest()
+    manifest["last_warm_start_seconds" if warm else "last_cold_start_seconds"] = round(seconds, 2)
+    save_driver_manifest(manifest)
+    
+    print(f"⏱️ {'Warm' if warm else 'Cold'} start: driver ready in {seconds:.2f}s")
+    cold = manifest.get("last_cold_start_seconds")
+    warm_time = manifest.get("last_warm_start_seconds")
+    if cold is not None and warm_time is not None:
+        print(f"   Last cold start: {cold}s | last warm start: {warm_time}s")
+
+def record_wait(phase, seconds):
+    """Remember how long a wait phase actually took"""
+    timings = WAIT_TIMINGS.get(phase)
+    if timings is None:
+        timings = WAIT_TIMINGS[phase] = deque(maxlen=WAIT_TIMINGS_KEEP)
+    timings.append(seconds)
+    if _metrics is not None:
+        _metrics.observe("wait_seconds", seconds, phase=phase)
+
+def run_wait_script(driver, phase, script, *args):
+    """Run an async wait script within the phase's latency budget"""
+    budget_ms = int(WAIT_BUDGETS.get(phase, 5) * 1000)
+    start = time.time()
+    settled = False
+    try:
+        settled = bool(driver.execute_async_script(script, *args, budget_ms))
+    except Exception as e:
+        print(f"⚠️ Wait '{phase}' failed: {e}")
+    record_wait(phase, time.time() - start)
+    return settled
+
+def wait_for_dom_quiet(driver, phase, root_selector=None, quiet_ms=None):
+    """Wait until the DOM under root_selector stops changing"""
+    quiet_ms = DOM_QUIET_MS if quiet_ms is None else quiet_ms
+    return run_wait_script(driver, phase, DOM_QUIET_JS, root_selector, quiet_ms)
+
+def wait_for_element_stable(driver, element, phase="element_stable", stable_frames=3):
+    """Wait until an element stops moving (e.g. after scrollIntoView)"""
+    return run_wait_script(driver, phase, ELEMENT_STABLE_JS, element, stable_frames)
+
+def print_wait_report():
+    """Print how long each wait phase took"""
+    if not WAIT_TIMINGS:
+        return
+    
+    print("\n⏱️ Wait timings (count / avg / max / budget):")
+    for phase, timings in WAIT_TIMINGS.items():
+        print(f"   {phase}: {len(timings)} / {sum(timings) / len(timings):.2f}s / "
+              f"{max(timings):.2f}s / {WAIT_BUDGETS.get(phase, 5)}s")
+
+def parse_wait_budgets(values):
+    """Apply --wait-budget phase=seconds overrides"""
+    for value in values or []:
+        phase, _, seconds = value.partition("=")
+        try:
+            WAIT_BUDGETS[phase.strip()] = float(seconds)
+        except ValueError:
+            print(f"⚠️ Ignoring invalid wait budget: {value}")
+
+class Metrics:
+    """Phase latency histograms and counters; exported as Prometheus text
+    and/or appended to a JSON-lines file as they happen"""
+    
+    def __init__(self, jsonl_path=None, labels=None, buckets=METRICS_BUCKETS):
+        self.labels = dict(labels or {})
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        # Time in spans not nested inside another span on the same thread
+        self.top_level_seconds = 0.0
+        self.server = None
+        self.file = open(jsonl_path, "a", encoding="utf-8", buffering=1) if jsonl_path else None
+    
+    def _write(self, record):
+        if self.file:
+            self.file.write(json.dumps({"ts": round(time.time(), 3), **self.labels, **record}, ensure_ascii=False) + "\n")
+    
+    def _add(self, name, amount, labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + amount
+    
+    def _observe(self, name, seconds, labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+        # Buckets are cumulative, as Prometheus expects
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                histogram["buckets"][i] += 1
+        histogram["sum"] += seconds
+        histogram["count"] += 1
+    
+    def inc(self, name, amount=1, **labels):
+        with self.lock:
+            self._add(name, amount, labels)
+            self._write({"type": "counter", "name": name, "value": amount, **labels})
+    
+    def observe(self, name, seconds, **labels):
+        with self.lock:
+            self._observe(name, seconds, labels)
+            self._write({"type": "histogram", "name": name, "seconds": round(seconds, 4), **labels})
+    
+    def span(self, phase, seconds, ok=True, top_level=True):
+        with self.lock:
+            if top_level:
+                self.top_level_seconds += seconds
+            self._observe("phase_seconds", seconds, {"phase": phase})
+            self._add("phase_total", 1, {"phase": phase, "outcome": "ok" if ok else "error"})
+            self._write({"type": "span", "phase": phase, "seconds": round(seconds, 4), "ok": ok})
+    
+    def format_labels(self, labels, extra=()):
+        pairs = list(self.labels.items()) + list(labels) + list(extra)
+        if not pairs:
+            return ""
+        escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+        return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+    
+    def prometheus_text(self):
+        """Everything in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            for name in sorted({name for name, _ in self.counters}):
+                metric = f"{METRICS_PREFIX}_{name}"
+                lines.append(f"# TYPE {metric} counter")
+                for (counter_name, labels), value in sorted(self.counters.items()):
+                    if counter_name == name:
+                        lines.append(f"{metric}{self.format_labels(labels)} {value}")
+            
+            for name in sorted({name for name, _ in self.histograms}):
+                metric = f"{METRICS_PREFIX}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for (histogram_name, labels), histogram in sorted(self.histograms.items()):
+                    if histogram_name != name:
+                        continue
+                    for bound, value in zip(self.buckets, histogram["buckets"]):
+                        lines.append(f"{metric}_bucket{self.format_labels(labels, [('le', bound)])} {value}")
+                    lines.append(f"{metric}_bucket{self.format_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+                    lines.append(f"{metric}_sum{self.format_labels(labels)} {histogram['sum']:.6f}")
+                    lines.append(f"{metric}_count{self.format_labels(labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+    
+    def serve(self, port, host=METRICS_HOST):
+        """Serve prometheus_text() on http://host:port/metrics from a thread"""
+        self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self.server.daemon_threads = True
+        self.server.metrics = self
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"📈 Metrics on http://{host}:{self.server.server_address[1]}/metrics")
+    
+    def print_stats(self):
+        """Phases sorted by the total time spent in them. Times are inclusive:
+        a phase's time also counts toward every phase it ran inside, so the
+        share column is relative to top-level time and does not add up to 100%"""
+        with self.lock:
+            phases = {dict(labels)["phase"]: histogram for (name, labels), histogram in self.histograms.items()
+                      if name == "phase_seconds"}
+            errors = {dict(labels)["phase"]: value for (name, labels), value in self.counters.items()
+                      if name == "phase_total" and dict(labels)["outcome"] == "error"}
+            counters = [(name, dict(labels), value) for (name, labels), value in sorted(self.counters.items())
+                        if name != "phase_total"]
+            total = self.top_level_seconds or 1
+        if not phases and not counters:
+            return
+        
+        print("\n" + "="*50)
+        print("📈 PHASE TIMINGS (inclusive; share of top-level time)")
+        print("="*50)
+        for phase, histogram in sorted(phases.items(), key=lambda item: -item[1]["sum"]):
+            print(f"{phase:<16} {histogram['count']:>5}x  total {histogram['sum']:8.2f}s  "
+                  f"mean {histogram['sum'] / histogram['count']:6.2f}s  {histogram['sum'] / total:5.1%}  "
+                  f"errors {errors.get(phase, 0)}")
+        for name, labels, value in counters:
+            print(f"{name} {labels}: {value}")
+        print("="*50)
+    
+    def close(self):
+        if self.server:
+            self.server.shutdown()
+            self.server = None
+        if self.file:
+            self.file.close()
+            self.file = None
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """GET /metrics returns the Prometheus text of the server's Metrics"""
+    
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.server.metrics.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+_metrics = None
+# How many timed() spans are open on each thread
+_span_depth = threading.local()
+
+def enable_metrics(jsonl_path=None, port=None, labels=None):
+    """Start recording spans and counters (and serving them if port is given)"""
+    global _metrics
+    _metrics = Metrics(jsonl_path, labels)
+    if port is not None:
+        _metrics.serve(port)
+    return _metrics
+
+def close_metrics():
+    """Print the phase summary and stop exporting"""
+    global _metrics
+    if _metrics is None:
+        return
+    _metrics.print_stats()
+    _metrics.close()
+    _metrics = None
+
+def count(name, amount=1, **labels):
+    """Bump a counter; a no-op while metrics are off"""
+    if _metrics is not None:
+        _metrics.inc(name, amount, **labels)
+
+def timed(phase, ok=bool):
+    """Decorator recording a span per call; ok(result) decides the outcome.
+    With metrics off the only cost is one global lookup per call"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _metrics is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            succeeded = False
+            depth = getattr(_span_depth, "value", 0)
+            _span_depth.value = depth + 1
+            try:
+                result = func(*args, **kwargs)
+                succeeded = ok(result)
+                return result
+            finally:
+                _span_depth.value = depth
+                if _metrics is not None:
+                    _metrics.span(phase, time.perf_counter() - start, succeeded, top_level=depth == 0)
+        return wrapper
+    return decorate
+
+class SelectorResolver:
+    """Per-target order of candidate selectors, learned from what matched:
+    the last winner is tried first and selectors that keep matching nothing
+    while another one works move to the end. Persisted between runs."""
+    
+    def __init__(self, path=SELECTOR_STATS_PATH, demote_after=SELECTOR_DEMOTE_AFTER):
+        self.path = path
+        self.demote_after = demote_after
+        self.targets = {}
+        self.dirty = False
+        self.load()
+    
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.targets = json.load(f).get("targets", {})
+        except (OSError, ValueError):
+            self.targets = {}
+    
+    def save(self):
+        if not self.dirty:
+            return
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"targets": self.targets}, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except OSError as e:
+            print(f"⚠️ Could not save selector stats: {e}")
+    
+    def order(self, target, candidates):
+        """candidates reordered: winner first, demoted selectors last, otherwise as given"""
+        state = self.targets.get(target, {})
+        stats = state.get("selectors", {})
+        winner = state.get("winner")
+        
+        def rank(item):
+            position, selector = item
+            demoted = stats.get(selector, {}).get("misses", 0) >= self.demote_after
+            return demoted, selector != winner, position
+        return [selector for _, selector in sorted(enumerate(candidates), key=rank)]
+    
+    def record(self, target, ordered, counts):
+        """Store a probe result; counts[i] is how many elements ordered[i]
+        matched, or None if it was not probed"""
+        winner = next((selector for selector, matched in zip(ordered, counts) if matched), None)
+        if winner is None:
+            # Nothing matched (page still loading?) - no evidence against anyone
+            return None
+        
+        state = self.targets.setdefault(target, {"winner": None, "selectors": {}})
+        for selector, matched in zip(ordered, counts):
+            if matched is None:
+                continue
+            entry = state["selectors"].setdefault(selector, {"wins": 0, "misses": 0})
+            if matched:
+                entry["misses"] = 0
+            else:
+                entry["misses"] += 1
+        state["selectors"][winner]["wins"] += 1
+        if state["winner"] != winner:
+            if state["winner"]:
+                print(f"🔀 Selector for '{target}' switched to: {winner}")
+            state["winner"] = winner
+        self.dirty = True
+        return winner
+    
+    def record_first_match(self, target, ordered, winner):
+        """Store the result of a script that stops at the first matching selector"""
+        if winner not in ordered:
+            return None
+        position = ordered.index(winner)
+        return self.record(target, ordered, [0] * position + [1] + [None] * (len(ordered) - position - 1))
+    
+    def resolve(self, driver, target, candidates, timeout=0, limit=50):
+        """Probe every candidate in one script call (repeated until timeout);
+        returns (winning selector, up to limit of its elements) or (None, [])"""
+        ordered = self.order(target, candidates)
+        deadline = time.time() + timeout
+        while True:
+            result = driver.execute_script(PROBE_SELECTORS_JS, ordered, limit) or {}
+            winner = self.record(target, ordered, result.get("counts") or [])
+            if winner:
+                if winner != candidates[0]:
+                    count("selector_fallbacks_total", target=target, selector=winner)
+                return winner, result.get("elements") or []
+            if time.time() >= deadline:
+                return None, []
+            time.sleep(SELECTOR_POLL_SECONDS)
+    
+    def print_stats(self):
+        for target, state in sorted(self.targets.items()):
+            demoted = [selector for selector, entry in state["selectors"].items()
+                       if entry["misses"] >= self.demote_after]
+            print(f"🎯 {target}: {state['winner']}" + (f" (demoted: {', '.join(demoted)})" if demoted else ""))
+
+_selector_resolver = None
+
+def get_selector_resolver():
+    """Shared selector resolver, loaded on first use"""
+    global _selector_resolver
+    if _selector_resolver is None:
+        _selector_resolver = SelectorResolver(SELECTOR_STATS_PATH)
+    return _selector_resolver
+
+def fix_chromedriver_issues():
+    """Fix common ChromeDriver issues"""
+    print("🔧 Checking and fixing ChromeDriver issues...")
+    
+    # Drop a manifest that points at a chromedriver which no longer exists;
+    # the ~/.wdm cache itself is only cleared after a real version mismatch
+    manifest = load_driver_manifest()
+    cached_path = manifest.get("chromedriver_path")
+    if cached_path and not os.path.exists(cached_path):
+        print("🗑️ Cached ChromeDriver is gone, it will be resolved again")
+        manifest.pop("chromedriver_path", None)
+        save_driver_manifest(manifest)
+    elif cached_path:
+        print(f"✅ Cached ChromeDriver found (Chrome {manifest.get('chrome_version') or 'unknown'})")
+
+def get_optimized_chrome_options(profile="default", user_data_dir=None):
     """Get optimized Chrome options for WhatsApp Web"""
     options = Options()
     
@@ -42,12 +944,33 @@ def get_optimized_chrome_options():
     options.add_argument("--disable-extensions")
     options.add_argument("--disable-notifications")
     options.add_argument("--disable-infobars")
-    options.add_argument("--start-maximized")
     options.add_argument("--disable-web-security")
     options.add_argument("--allow-running-insecure-content")
     
-    # User data directory for login persistence
-    user_data_dir = os.path.join(os.getcwd(), "chrome-data")
+    if profile == "lean":
+        # Headless (new mode) with a regular user agent - WhatsApp rejects "HeadlessChrome"
+        chrome_version = get_chrome_version() or load_driver_manifest().get("chrome_version") or "120"
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1280,900")
+        options.add_argument(
+            "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+            f"(KHTML, like Gecko) Chrome/{chrome_version.split('.')[0]}.0.0.0 Safari/537.36"
+        )
+        # No images, small caches, one renderer and no background services
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("--disk-cache-size=1048576")
+        options.add_argument("--media-cache-size=1048576")
+        options.add_argument("--aggressive-cache-discard")
+        options.add_argument("--renderer-process-limit=1")
+        options.add_argument("--disable-background-networking")
+        options.add_argument("--disable-component-update")
+        options.add_argument("--disable-features=Translate,MediaRouter,OptimizationHints")
+        options.add_argument("--mute-audio")
+    else:
+        options.add_argument("--start-maximized")
+    
+    # User data directory for login persistence (one per WhatsApp account)
+    user_data_dir = user_data_dir or CHROME_DATA_DIR
     if not os.path.exists(user_data_dir):
         os.makedirs(user_data_dir)
     options.add_argument(f"--user-data-dir={user_data_dir}")
@@ -64,29 +987,160 @@ def get_optimized_chrome_options():
             "media_stream": 2,
         }
     }
+    if profile == "lean":
+        prefs["profile.managed_default_content_settings.images"] = 2
     options.add_experimental_option("prefs", prefs)
     
     return options
 
-def create_chrome_driver():
+def apply_chrome_profile(driver, profile):
+    """Per-session settings of a profile: the lean one blocks heavy requests through CDP"""
+    if _webdriver_profiler is not None:
+        _webdriver_profiler.attach(driver)
+    if profile == "lean":
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+            print(f"🪶 Lean profile: blocking {len(LEAN_BLOCKED_URLS)} image/media/font URL patterns")
+        except Exception as e:
+            print(f"⚠️ Could not enable request blocking: {e}")
+    return driver
+
+def trim_chrome_profile(user_data_dir=None):
+    """Delete cache folders from chrome-data (login data is kept); returns MB freed"""
+    user_data_dir = user_data_dir or CHROME_DATA_DIR
+    freed = 0
+    for relative in PROFILE_TRIM_DIRS:
+        path = os.path.join(user_data_dir, *relative.split("/"))
+        if not os.path.isdir(path):
+            continue
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    freed += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        shutil.rmtree(path, ignore_errors=True)
+    
+    freed_mb = freed / (1024 * 1024)
+    if freed:
+        print(f"🧹 Trimmed {freed_mb:.1f} MB of caches from {user_data_dir}")
+    return freed_mb
+
+def process_tree_rss_mb(pid):
+    """Resident memory (MB) of a process and all its children, or None if unknown"""
+    if psutil is not None:
+        try:
+            parent = psutil.Process(pid)
+            processes = [parent] + parent.children(recursive=True)
+            total = 0
+            for process in processes:
+                try:
+                    total += process.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total / (1024 * 1024)
+        except psutil.Error:
+            return None
+    
+    # Linux fallback without psutil: walk /proc
+    if not os.path.isdir("/proc"):
+        return None
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                parent_pid = int(f.read().rsplit(")", 1)[1].split()[1])
+            children.setdefault(parent_pid, []).append(int(entry))
+        except (OSError, ValueError, IndexError):
+            continue
+    
+    total_kb = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        stack.extend(children.get(current, []))
+        try:
+            with open(f"/proc/{current}/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024
+
+def browser_rss_mb(driver):
+    """RSS of chromedriver plus every Chrome process it started"""
+    try:
+        return process_tree_rss_mb(driver.service.process.pid)
+    except Exception:
+        return None
+
+def own_rss_mb():
+    """Resident memory (MB) of this Python process alone, or None if unknown"""
+    if psutil is not None:
+        try:
+            return psutil.Process().memory_info().rss / (1024 * 1024)
+        except psutil.Error:
+            return None
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+def report_profile_resources(driver, profile, startup_seconds):
+    """Print and remember startup time and RSS for the profile"""
+    rss = browser_rss_mb(driver)
+    print(f"📏 Profile '{profile}': ready in {startup_seconds:.1f}s, "
+          f"browser RSS {f'{rss:.0f} MB' if rss is not None else 'unknown'}")
+    
+    manifest = load_driver_manifest()
+    manifest.setdefault("profiles", {})[profile] = {
+        "startup_seconds": round(startup_seconds, 2),
+        "rss_mb": round(rss, 1) if rss is not None else None,
+        "measured_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    save_driver_manifest(manifest)
+    for name, stats in manifest["profiles"].items():
+        if name != profile:
+            print(f"   Last '{name}' run: ready in {stats['startup_seconds']}s, RSS {stats['rss_mb']} MB")
+
+@timed("driver_create")
+def create_chrome_driver(profile="default", user_data_dir=None):
     """Create Chrome driver with multiple fallback methods"""
     print("🔧 Creating Chrome driver...")
     
-    # Method 1: Try with ChromeDriverManager
+    # Method 1: Try the cached ChromeDriver (downloads only when Chrome changed)
+    start = time.time()
+    chromedriver_path = None
     try:
-        print("🔄 Trying ChromeDriverManager...")
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=get_optimized_chrome_options())
+        print("🔄 Trying cached ChromeDriver...")
+        chromedriver_path, warm = resolve_chromedriver()
+        try:
+            driver = webdriver.Chrome(service=Service(chromedriver_path), options=get_optimized_chrome_options(profile, user_data_dir))
+        except SessionNotCreatedException as e:
+            if not is_version_mismatch(e):
+                raise
+            print("⚠️ ChromeDriver does not match Chrome - refreshing cache...")
+            count("retries_total", kind="driver_refresh")
+            clear_chromedriver_cache()
+            chromedriver_path, warm = resolve_chromedriver(force_refresh=True)
+            driver = webdriver.Chrome(service=Service(chromedriver_path), options=get_optimized_chrome_options(profile, user_data_dir))
         print("✅ ChromeDriverManager method successful")
-        return driver
+        record_driver_start_time(time.time() - start, warm)
+        return apply_chrome_profile(driver, profile)
     except Exception as e:
         print(f"❌ ChromeDriverManager failed: {e}")
     
-    # Method 2: Try with explicit ChromeDriver path
+    # Method 2: Try the same ChromeDriver again after fixing its permissions
     try:
-        print("🔄 Trying with manual ChromeDriver download...")
-        chromedriver_path = ChromeDriverManager().install()
-        
-        if os.path.exists(chromedriver_path):
+        if chromedriver_path and os.path.exists(chromedriver_path):
             print(f"📂 ChromeDriver found at: {chromedriver_path}")
             
             try:
@@ -95,9 +1149,10 @@ def create_chrome_driver():
                 pass
             
             service = Service(chromedriver_path)
-            driver = webdriver.Chrome(service=service, options=get_optimized_chrome_options())
+            driver = webdriver.Chrome(service=service, options=get_optimized_chrome_options(profile, user_data_dir))
             print("✅ Manual ChromeDriver method successful")
-            return driver
+            count("driver_fallbacks_total", method="manual")
+            return apply_chrome_profile(driver, profile)
         else:
             print("❌ ChromeDriver file not found")
             
@@ -107,219 +1162,331 @@ def create_chrome_driver():
     # Method 3: Try with system PATH ChromeDriver
     try:
         print("🔄 Trying ChromeDriver from system PATH...")
-        driver = webdriver.Chrome(options=get_optimized_chrome_options())
+        driver = webdriver.Chrome(options=get_optimized_chrome_options(profile, user_data_dir))
         print("✅ System PATH ChromeDriver method successful")
-        return driver
+        count("driver_fallbacks_total", method="system_path")
+        return apply_chrome_profile(driver, profile)
     except Exception as e:
         print(f"❌ System PATH ChromeDriver failed: {e}")
     
     print("❌ All ChromeDriver methods failed")
     return None
 
+@timed("whatsapp_load")
 def wait_for_whatsapp_load(driver, timeout=60):
     """Wait for WhatsApp Web to load completely"""
     print("⏳ Waiting for WhatsApp Web to load...")
     
-    wait = WebDriverWait(driver, timeout)
+    resolver = get_selector_resolver()
     
-    # Check for QR code first
-    try:
-        qr_code = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='qr-code']"))
-        )
+    # Chat list and QR code are probed together, so a logged-in session
+    # doesn't sit through a QR timeout first
+    selector, _ = resolver.resolve(driver, "startup", CHAT_LIST_READY_SELECTORS + QR_CODE_SELECTORS, timeout)
+    if selector in QR_CODE_SELECTORS:
         print("📱 QR Code detected - please scan with your phone")
+        selector, _ = resolver.resolve(driver, "chat_list_ready", CHAT_LIST_READY_SELECTORS, timeout)
+        if selector:
+            print("✅ Authentication successful!")
+    
+    if not selector:
+        print("❌ WhatsApp Web failed to load")
+        return False
+    
+    print(f"✅ WhatsApp Web loaded successfully ({selector})")
+    wait_for_dom_quiet(driver, "whatsapp_load", "#pane-side" if selector != "#side" else "#side")
+    return True
+
+def open_whatsapp(driver):
+    """Set session timeouts, open WHATSAPP_URL and wait until the chat list is there"""
+    driver.set_page_load_timeout(60)
+    driver.implicitly_wait(IMPLICIT_WAIT_SECONDS)
+    driver.set_script_timeout(max(WAIT_BUDGETS.values()) + 5)
+    
+    print("🌐 Opening WhatsApp Web...")
+    driver.get(WHATSAPP_URL)
+    return wait_for_whatsapp_load(driver)
+
+def normalize_name(text):
+    """Collapse whitespace and lowercase a name for matching"""
+    return " ".join((text or "").split()).lower()
+
+def snapshot_chat_list(driver, selectors=None):
+    """Read every rendered chat row with one execute_script call"""
+    if selectors:
+        snapshot = driver.execute_script(CHAT_LIST_SNAPSHOT_JS, selectors) or {}
+        return snapshot.get("selector"), snapshot.get("rows") or []
+    
+    resolver = get_selector_resolver()
+    ordered = resolver.order("chat_row", CHAT_ROW_SELECTORS)
+    snapshot = driver.execute_script(CHAT_LIST_SNAPSHOT_JS, ordered) or {}
+    selector = resolver.record_first_match("chat_row", ordered, snapshot.get("selector"))
+    if selector and selector != CHAT_ROW_SELECTORS[0]:
+        count("selector_fallbacks_total", target="chat_row", selector=selector)
+    return snapshot.get("selector"), snapshot.get("rows") or []
+
+def match_chat_row(rows, contact_name):
+    """Pick the row for contact_name: exact title first, then a substring of the row text"""
+    wanted = normalize_name(contact_name)
+    if not wanted:
+        return None
+    
+    by_title = {}
+    for row in rows:
+        by_title.setdefault(normalize_name(row.get("title")), row)
+    if wanted in by_title:
+        return by_title[wanted]
+    
+    for row in rows:
+        if wanted in normalize_name(row.get("title")) or wanted in normalize_name(row.get("text")):
+            return row
+    return None
+
+class ChatIndex:
+    """Persistent map of normalized contact names to where their chat was last seen"""
+    
+    def __init__(self, path=CHAT_INDEX_PATH, max_age_days=CHAT_INDEX_MAX_AGE_DAYS):
+        self.path = path
+        self.max_age = max_age_days * 24 * 3600
+        self.entries = {}
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "visible": 0, "updates": 0}
+        self.dirty = False
+        self.load()
+    
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("entries", {})
+        except (OSError, ValueError):
+            self.entries = {}
+    
+    def save(self):
+        if not self.dirty:
+            return
+        # Stale entries would be ignored by lookup anyway; dropping them keeps the index bounded
+        now = time.time()
+        self.entries = {key: entry for key, entry in self.entries.items()
+                        if now - entry.get("seen_at", 0) <= self.max_age}
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"entries": self.entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except OSError as e:
+            print(f"⚠️ Could not save chat index: {e}")
+    
+    def observe(self, rows):
+        """Record where every row of a chat list snapshot was seen"""
+        now = time.time()
+        for row in rows:
+            key = normalize_name(row.get("title"))
+            if not key:
+                continue
+            entry = self.entries.get(key)
+            if entry and entry["chat_id"] == row.get("chat_id") and entry["offset"] == row.get("offset"):
+                entry["seen_at"] = now
+                continue
+            self.entries[key] = {
+                "title": row.get("title"),
+                "chat_id": row.get("chat_id"),
+                "offset": row.get("offset"),
+                "seen_at": now,
+            }
+            self.stats["updates"] += 1
+        self.dirty = True
+    
+    def lookup(self, contact_name):
+        """Return the index entry for a contact, or None if unknown or stale"""
+        # Exact names only: a substring ("ali" in "khalid mehmood") would open another chat
+        key = normalize_name(contact_name)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
         
-        # Wait for QR code to disappear
-        WebDriverWait(driver, timeout).until_not(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='qr-code']"))
-        )
-        print("✅ Authentication successful!")
-    except TimeoutException:
-        print("ℹ️ No QR code found - may already be logged in")
+        if time.time() - entry.get("seen_at", 0) > self.max_age or entry.get("offset") is None:
+            self.invalidate(key)
+            return None
+        return entry
+    
+    def invalidate(self, contact_name):
+        if self.entries.pop(normalize_name(contact_name), None) is not None:
+            self.stats["stale"] += 1
+            self.dirty = True
+    
+    def print_stats(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = f"{self.stats['hits'] / lookups:.0%}" if lookups else "n/a"
+        print(f"🗂️ Chat index: {len(self.entries)} entries | visible {self.stats['visible']} | "
+              f"hits {self.stats['hits']} | misses {self.stats['misses']} | stale {self.stats['stale']} | "
+              f"hit rate {hit_rate}")
+
+_chat_index = None
+
+def get_chat_index():
+    """Shared chat index, loaded on first use"""
+    global _chat_index
+    if _chat_index is None:
+        _chat_index = ChatIndex(CHAT_INDEX_PATH)
+    return _chat_index
+
+def find_chat_with_index(driver, contact_name):
+    """Jump straight to a contact's last known position instead of sweeping the list"""
+    index = get_chat_index()
+    entry = index.lookup(contact_name)
+    if not entry:
+        return None
+    
+    print(f"🗂️ Chat index: jumping to '{entry['title']}' at offset {entry['offset']}")
+    driver.execute_script(SCROLL_CHAT_LIST_TO_JS, entry["offset"])
+    wait_for_dom_quiet(driver, "chat_scroll", "#pane-side")
+    
+    _, rows = snapshot_chat_list(driver)
+    index.observe(rows)
+    # Only a row still titled contact_name counts, preferably the same chat id
+    wanted = normalize_name(contact_name)
+    titled = [r for r in rows if normalize_name(r.get("title")) == wanted]
+    row = next((r for r in titled if entry["chat_id"] and r.get("chat_id") == entry["chat_id"]), None)
+    row = row or next(iter(titled), None)
+    if row:
+        return row
     
-    # Wait for chat list to load
+    print("⚠️ Chat index entry is stale, falling back to a full scroll")
+    index.invalidate(entry["title"])
+    return None
+
+def click_chat_element(driver, chat):
+    """Click a chat row, falling back to JavaScript and ActionChains clicks"""
+    # Method 1: Regular click
     try:
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='chat-list']")))
-        print("✅ WhatsApp Web loaded successfully")
-        time.sleep(3)  # Additional wait for stability
+        chat.click()
+        print("👆 Chat clicked (regular click)")
         return True
-    except TimeoutException:
-        # Fallback check
-        try:
-            wait.until(EC.presence_of_element_located((By.ID, "side")))
-            print("✅ WhatsApp Web loaded successfully (fallback)")
-            time.sleep(3)
-            return True
-        except TimeoutException:
-            print("❌ WhatsApp Web failed to load")
-            return False
+    except Exception as e:
+        print(f"⚠️ Regular click failed: {e}")
+    
+    # Method 2: JavaScript click
+    try:
+        driver.execute_script("arguments[0].click();", chat)
+        print("👆 Chat clicked (JavaScript click)")
+        count("click_fallbacks_total", method="javascript")
+        return True
+    except Exception as e:
+        print(f"⚠️ JavaScript click failed: {e}")
+    
+    # Method 3: ActionChains click
+    try:
+        ActionChains(driver).move_to_element(chat).click().perform()
+        print("👆 Chat clicked (ActionChains click)")
+        count("click_fallbacks_total", method="action_chains")
+        return True
+    except Exception as e:
+        print(f"⚠️ ActionChains click failed: {e}")
+    
+    print("❌ All click methods failed")
+    count("click_fallbacks_total", method="failed")
+    return False
+
+def open_chat_row(driver, row):
+    """Scroll a snapshot row into view, click it and wait for the conversation"""
+    chat = row["element"]
+    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", chat)
+    wait_for_element_stable(driver, chat)
+    
+    if not click_chat_element(driver, chat):
+        return False
+    
+    # Wait for conversation to load
+    return wait_for_conversation_load(driver)
 
+@timed("chat_lookup")
 def find_and_click_chat_improved(driver, contact_name, timeout=30):
     """Improved function to find and click on a specific chat"""
     print(f"🔎 Looking for chat with '{contact_name}'...")
     
-    wait = WebDriverWait(driver, timeout)
-    
     # Wait for chat list to be fully loaded
-    time.sleep(5)
-    
-    # Multiple selector strategies to find chats
-    chat_selectors = [
-        "div[aria-label='Chat list'] > div > div",
-        "#pane-side div[role='listitem']",
-        "div[data-testid='chat-list'] div[role='listitem']",
-        "div#pane-side > div > div > div > div",
-        "div[role='row']"
-    ]
+    wait_for_dom_quiet(driver, "chat_list", "#pane-side")
     
-    for selector in chat_selectors:
-        try:
-            print(f"🔍 Trying selector: {selector}")
-            
-            # Wait for elements to be present
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
-            
-            # Get all chat items
-            chat_items = driver.find_elements(By.CSS_SELECTOR, selector)
-            print(f"📋 Found {len(chat_items)} potential chat items")
-            
-            if len(chat_items) == 0:
-                continue
-            
-            # Search through each chat
-            for i, chat in enumerate(chat_items):
-                try:
-                    # Get all text content from the chat element
-                    chat_text = chat.text
-                    
-                    # Remove line breaks and extra spaces for matching
-                    chat_text_normalized = " ".join(chat_text.split())
-                    
-                    # Debug: print first few chats
-                    if i < 5:
-                        print(f"  Chat {i}: {chat_text[:50]}...")
-                    
-                    # Check if contact name matches (case-insensitive, normalized)
-                    contact_name_normalized = " ".join(contact_name.split())
-                    if contact_name_normalized.lower() in chat_text_normalized.lower():
-                        print(f"✅ MATCH FOUND at index {i}!")
-                        print(f"   Full text: {chat_text}")
-                        
-                        # Scroll element into view
-                        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", chat)
-                        time.sleep(1)
-                        
-                        # Try multiple click methods
-                        click_successful = False
-                        
-                        # Method 1: Regular click
-                        try:
-                            chat.click()
-                            click_successful = True
-                            print("👆 Chat clicked (regular click)")
-                        except Exception as e:
-                            print(f"⚠️ Regular click failed: {e}")
-                        
-                        # Method 2: JavaScript click
-                        if not click_successful:
-                            try:
-                                driver.execute_script("arguments[0].click();", chat)
-                                click_successful = True
-                                print("👆 Chat clicked (JavaScript click)")
-                            except Exception as e:
-                                print(f"⚠️ JavaScript click failed: {e}")
-                        
-                        # Method 3: ActionChains click
-                        if not click_successful:
-                            try:
-                                ActionChains(driver).move_to_element(chat).click().perform()
-                                click_successful = True
-                                print("👆 Chat clicked (ActionChains click)")
-                            except Exception as e:
-                                print(f"⚠️ ActionChains click failed: {e}")
-                        
-                        if click_successful:
-                            # Wait for conversation to load
-                            time.sleep(3)
-                            return wait_for_conversation_load(driver)
-                        else:
-                            print("❌ All click methods failed")
-                            return False
-                        
-                except Exception as e:
-                    print(f"⚠️ Error processing chat {i}: {e}")
-                    continue
-            
-        except TimeoutException:
-            print(f"⚠️ Selector timeout: {selector}")
-            continue
-        except Exception as e:
-            print(f"⚠️ Error with selector {selector}: {e}")
-            continue
+    def rows_rendered(d):
+        snapshot = snapshot_chat_list(d)
+        return snapshot if snapshot[1] else False
+    
+    try:
+        # One scripted snapshot replaces a find_elements + .text roundtrip per row
+        selector, rows = WebDriverWait(driver, timeout).until(rows_rendered)
+        print(f"📋 Found {len(rows)} chat items with: {selector}")
+        index = get_chat_index()
+        index.observe(rows)
+        
+        # Debug: print first few chats
+        for row in rows[:5]:
+            print(f"  Chat {row['index']}: {row['text'][:50]}...")
+        
+        row = match_chat_row(rows, contact_name)
+        if row:
+            print(f"✅ MATCH FOUND at index {row['index']}!")
+            print(f"   Full text: {row['text']}")
+            index.stats["visible"] += 1
+            return open_chat_row(driver, row)
+        
+        # Known contact: one jump to its last position instead of a full sweep
+        row = find_chat_with_index(driver, contact_name)
+        if row:
+            print(f"✅ Found chat via chat index at index {row['index']}!")
+            index.stats["hits"] += 1
+            return open_chat_row(driver, row)
+        index.stats["misses"] += 1
+        
+    except TimeoutException:
+        print("⚠️ No chat list rows found")
+    except Exception as e:
+        print(f"⚠️ Error reading chat list: {e}")
     
     # If not found, try scrolling and searching again
     print("🔄 Chat not found in visible area, trying to scroll...")
     return scroll_and_find_chat(driver, contact_name)
 
-def scroll_and_find_chat(driver, contact_name):
-    """Scroll through chat list and search for contact"""
+@timed("chat_scroll")
+def scroll_and_find_chat(driver, contact_name, max_scrolls=None):
+    """Scroll through chat list and search for contact, down to the end of
+    the list (or at most max_scrolls pages)"""
     print("📜 Scrolling through chat list...")
     
     try:
         # Find the chat list container
-        chat_list_container = None
-        container_selectors = [
-            "#pane-side",
-            "div[aria-label='Chat list']",
-            "div[data-testid='chat-list']"
-        ]
-        
-        for selector in container_selectors:
-            try:
-                chat_list_container = driver.find_element(By.CSS_SELECTOR, selector)
-                if chat_list_container:
-                    break
-            except:
-                continue
+        _, containers = get_selector_resolver().resolve(driver, "chat_container", CHAT_CONTAINER_SELECTORS, limit=1)
+        chat_list_container = containers[0] if containers else None
         
         if not chat_list_container:
             print("❌ Could not find chat list container")
             return False
         
-        # Scroll and search
-        last_height = driver.execute_script("return arguments[0].scrollHeight", chat_list_container)
+        # Scroll one page at a time so every row passes through the
+        # (virtualized) list and gets recorded in the chat index
+        index = get_chat_index()
+        last_top = driver.execute_script("return arguments[0].scrollTop", chat_list_container)
         scroll_attempts = 0
-        max_scrolls = 10
         
-        while scroll_attempts < max_scrolls:
+        while max_scrolls is None or scroll_attempts < max_scrolls:
             # Scroll down
-            driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", chat_list_container)
-            time.sleep(2)
+            new_top = driver.execute_script(
+                "arguments[0].scrollTop += arguments[0].clientHeight * 0.9; return arguments[0].scrollTop",
+                chat_list_container
+            )
+            wait_for_dom_quiet(driver, "chat_scroll", "#pane-side")
             
             # Try to find chat again
-            chat_items = driver.find_elements(By.CSS_SELECTOR, "div[role='listitem']")
-            
-            for chat in chat_items:
-                try:
-                    chat_text_normalized = " ".join(chat.text.split())
-                    contact_name_normalized = " ".join(contact_name.split())
-                    
-                    if contact_name_normalized.lower() in chat_text_normalized.lower():
-                        print(f"✅ Found chat after scrolling!")
-                        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", chat)
-                        time.sleep(1)
-                        chat.click()
-                        time.sleep(3)
-                        return wait_for_conversation_load(driver)
-                except:
-                    continue
+            _, rows = snapshot_chat_list(driver)
+            index.observe(rows)
+            row = match_chat_row(rows, contact_name)
+            if row:
+                print(f"✅ Found chat after scrolling!")
+                return open_chat_row(driver, row)
             
             # Check if we've reached the end
-            new_height = driver.execute_script("return arguments[0].scrollHeight", chat_list_container)
-            if new_height == last_height:
+            if new_top == last_top:
                 break
             
-            last_height = new_height
+            last_top = new_top
             scroll_attempts += 1
         
         print("❌ Chat not found even after scrolling")
@@ -333,101 +1500,370 @@ def wait_for_conversation_load(driver, timeout=30):
     """Wait for conversation panel to load"""
     print("⏳ Waiting for conversation to load...")
     
-    wait = WebDriverWait(driver, timeout)
-    
-    conversation_indicators = [
-        "div[data-testid='conversation-panel-body']",
-        "div[data-testid='msg-container']",
-        "div#main",
-        "footer[data-testid='compose-panel']"
-    ]
-    
-    for indicator in conversation_indicators:
-        try:
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, indicator)))
-            print(f"✅ Conversation loaded - found: {indicator}")
-            time.sleep(3)
-            return True
-        except TimeoutException:
-            continue
+    # One probe of every indicator per poll, against one shared deadline
+    indicator, _ = get_selector_resolver().resolve(driver, "conversation", CONVERSATION_SELECTORS, timeout, limit=1)
+    if indicator:
+        print(f"✅ Conversation loaded - found: {indicator}")
+        wait_for_dom_quiet(driver, "conversation", "#main")
+        return True
     
     print("❌ Could not confirm conversation loading")
     return False
 
-def extract_contact_info(driver):
-    """Extract contact name and phone number"""
-    print("🔎 Extracting contact information...")
+class ContactCache:
+    """Persistent map of chat identity (WhatsApp id, or the name when there is
+    none) to the contact's resolved phone number"""
     
-    contact_info = {"name": "Unknown", "phone": "Unknown"}
+    def __init__(self, path=CONTACT_CACHE_PATH, ttl_days=CONTACT_CACHE_TTL_DAYS,
+                 miss_ttl_hours=CONTACT_CACHE_MISS_TTL_HOURS):
+        self.path = path
+        self.ttl = ttl_days * 24 * 3600
+        self.miss_ttl = miss_ttl_hours * 3600
+        self.entries = {}
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "drawer_reads": 0}
+        self.dirty = False
+        self.load()
     
-    try:
-        # Get contact name from header
-        name_selectors = [
-            "header span[title]",
-            "header div[title]",
-            "div[data-testid='conversation-info-header'] span",
-        ]
-        
-        for selector in name_selectors:
-            try:
-                elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                for element in elements:
-                    name = element.get_attribute("title") or element.text
-                    if name and len(name) > 0 and name not in ["", " ", "Type a message"]:
-                        contact_info["name"] = name.strip()
-                        print(f"✅ Contact name: {contact_info['name']}")
-                        break
-                if contact_info["name"] != "Unknown":
-                    break
-            except:
-                continue
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("entries", {})
+        except (OSError, ValueError):
+            self.entries = {}
+    
+    def save(self):
+        if not self.dirty:
+            return
+        # Expired entries are resolved again on their next use, so they needn't be kept
+        now = time.time()
+        self.entries = {key: entry for key, entry in self.entries.items()
+                        if now - entry["resolved_at"] <= (self.ttl if entry["phone"] else self.miss_ttl)}
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"entries": self.entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except OSError as e:
+            print(f"⚠️ Could not save contact cache: {e}")
+    
+    def get(self, key):
+        """The cached entry, or None if unknown or due for a refresh"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        # Numbers we could not find are retried sooner than known ones are refreshed
+        ttl = self.ttl if entry["phone"] else self.miss_ttl
+        if time.time() - entry["resolved_at"] > ttl:
+            self.stats["expired"] += 1
+            return None
+        self.stats["hits"] += 1
+        return entry
+    
+    def put(self, key, name, phone, source):
+        self.entries[key] = {"name": name, "phone": phone, "source": source, "resolved_at": time.time()}
+        self.dirty = True
+    
+    def print_stats(self):
+        print(f"📇 Contact cache: {self.stats['hits']} hits, {self.stats['misses']} misses, "
+              f"{self.stats['expired']} refreshed, {self.stats['drawer_reads']} info panel reads, "
+              f"{len(self.entries)} contacts")
+
+_contact_cache = None
+
+def get_contact_cache():
+    """Shared contact cache, loaded on first use"""
+    global _contact_cache
+    if _contact_cache is None:
+        _contact_cache = ContactCache(CONTACT_CACHE_PATH)
+    return _contact_cache
+
+def phone_from_text(text):
+    """First phone number in text: Pakistani mobiles as 03XXXXXXXXX, others as +digits"""
+    match = PHONE_PATTERN.search(text or "")
+    if match:
+        return normalize_phone_number(match.group(1))
+    match = re.search(r"\+\d[\d\s()-]{7,}\d", text or "")
+    return "+" + re.sub(r"\D", "", match.group(0)) if match else None
+
+def phone_from_jid(jid):
+    """Phone number of a personal chat id such as 923001234567@c.us"""
+    user, _, server = (jid or "").partition("@")
+    if server != "c.us" or not user.isdigit():
+        return None
+    return normalize_phone_number(user) or "+" + user
+
+def read_phone_from_drawer(driver):
+    """Open the contact info panel, read the phone number from it and close it (slow)"""
+    resolver = get_selector_resolver()
+    _, headers = resolver.resolve(driver, "contact_header", CONTACT_HEADER_SELECTORS, limit=1)
+    if not headers:
+        return None
+    try:
+        headers[0].click()
+    except Exception:
+        driver.execute_script("arguments[0].click();", headers[0])
+    
+    _, drawers = resolver.resolve(driver, "contact_drawer", CONTACT_DRAWER_SELECTORS, CONTACT_DRAWER_TIMEOUT, limit=1)
+    if not drawers:
+        print("⚠️ Contact info panel did not open")
+        return None
+    get_contact_cache().stats["drawer_reads"] += 1
+    
+    try:
+        # The number can render a moment after the panel itself
+        deadline = time.time() + CONTACT_DRAWER_TIMEOUT
+        while True:
+            phone = phone_from_text(driver.execute_script("return arguments[0].innerText || '';", drawers[0]))
+            if phone or time.time() >= deadline:
+                return phone
+            time.sleep(SELECTOR_POLL_SECONDS)
+    finally:
+        ActionChains(driver).send_keys(Keys.ESCAPE).perform()
+
+def resolve_contact_phone(driver, name):
+    """Phone number of the open chat: from the contact cache, else from the
+    chat id, a number shown as the name, or (once) the contact info panel"""
+    jid = driver.execute_script(CHAT_IDENTITY_JS)
+    if not jid and name == "Unknown":
+        return "Unknown"
+    
+    cache = get_contact_cache()
+    key = jid or f"name:{normalize_name(name)}"
+    entry = cache.get(key)
+    if entry is not None:
+        print(f"📇 Phone from contact cache: {entry['phone'] or 'not available'}")
+        return entry["phone"] or "Unknown"
+    
+    phone, source = phone_from_jid(jid), "chat_id"
+    if not phone:
+        # Unsaved contacts are shown by their number
+        phone, source = phone_from_text(name), "header"
+    if not phone and not (jid or "").endswith("@g.us"):
+        phone, source = read_phone_from_drawer(driver), "info_panel"
+    
+    cache.put(key, name, phone, source if phone else None)
+    if phone:
+        print(f"✅ Contact phone: {phone} (from {source.replace('_', ' ')})")
+    else:
+        print("⚠️ Phone number not found")
+    return phone or "Unknown"
+
+@timed("extract_contact", ok=lambda info: info["name"] != "Unknown")
+def extract_contact_info(driver):
+    """Extract contact name and phone number"""
+    print("🔎 Extracting contact information...")
+    
+    contact_info = {"name": "Unknown", "phone": "Unknown"}
+    
+    try:
+        # Get contact name from header
+        _, elements = get_selector_resolver().resolve(driver, "contact_name", CONTACT_NAME_SELECTORS, limit=5)
+        for element in elements:
+            name = element.get_attribute("title") or element.text
+            if name and len(name) > 0 and name not in ["", " ", "Type a message"]:
+                contact_info["name"] = name.strip()
+                print(f"✅ Contact name: {contact_info['name']}")
+                break
         
+        contact_info["phone"] = resolve_contact_phone(driver, contact_info["name"])
     except Exception as e:
         print(f"⚠️ Error extracting contact info: {e}")
     
     return contact_info
 
+def extract_messages_since(driver, since_id=None, incoming_only=True, last=None):
+    """Messages of the open chat after since_id as {id, sender, timestamp, text} records"""
+    return driver.execute_script(EXTRACT_MESSAGES_SINCE_JS, since_id, incoming_only, last) or []
+
+def combine_complaint_text(records):
+    """Join the fragments of a complaint split over several messages"""
+    return " ".join(record["text"].strip() for record in records if record.get("text", "").strip())
+
 def extract_latest_message(driver):
     """Extract the latest message"""
     print("🔎 Extracting latest message...")
     
-    time.sleep(3)
+    wait_for_dom_quiet(driver, "messages", "#main")
     
-    message_selectors = [
-        "div[data-testid='msg-container']",
-        "div.message-in, div.message-out",
-        "div[role='row']"
-    ]
+    try:
+        records = extract_messages_since(driver, incoming_only=False)
+        print(f"📋 Found {len(records)} messages")
+        
+        # Get last message
+        for record in reversed(records):
+            if len(record["text"]) > 5:
+                print(f"✅ Latest message: {record['text'][:100]}...")
+                return record["text"]
+    except Exception as e:
+        print(f"⚠️ Error extracting messages: {e}")
+    
+    print("❌ Could not extract message")
+    return "No message found"
+
+@timed("extract_message")
+def extract_latest_complaint(driver, max_fragments=10):
+    """Extract the customer's latest burst of messages (everything after our last reply)"""
+    print("🔎 Extracting latest complaint...")
+    
+    wait_for_dom_quiet(driver, "messages", "#main")
+    
+    try:
+        records = extract_messages_since(driver, incoming_only=False)
+        burst = []
+        for record in reversed(records):
+            if not record["incoming"] or len(burst) >= max_fragments:
+                break
+            burst.insert(0, record)
+        
+        message = combine_complaint_text(burst)
+        if len(message) > 5:
+            print(f"✅ Latest complaint ({len(burst)} message(s)): {message[:100]}...")
+            return message
+    except Exception as e:
+        print(f"⚠️ Error extracting messages: {e}")
     
-    for selector in message_selectors:
+    # No incoming burst (e.g. we replied last) - fall back to the newest message
+    return extract_latest_message(driver)
+
+WEEKDAY_NAMES = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+def parse_chat_time(label, now=None):
+    """Unix time of a chat row's last-activity label ("10:32", "10:32 PM",
+    "Yesterday", a weekday or a day-first date), or None. Labels without a
+    time of day count from the start of that day."""
+    if not label:
+        return None
+    now = time.time() if now is None else now
+    today = time.localtime(now)
+    midnight = time.mktime((today.tm_year, today.tm_mon, today.tm_mday, 0, 0, 0, 0, 0, -1))
+    label = label.strip().lower()
+    
+    match = re.fullmatch(r"(\d{1,2})[:.](\d{2})(?:\s?([ap])\.?m\.?)?", label)
+    if match:
+        hour, minute = int(match.group(1)) % 24, int(match.group(2))
+        if match.group(3):
+            hour = hour % 12 + (12 if match.group(3) == "p" else 0)
+        stamp = midnight + hour * 3600 + minute * 60
+        # A time later than now is from yesterday
+        return stamp if stamp <= now else stamp - 86400
+    if label == "today":
+        return midnight
+    if label == "yesterday":
+        return midnight - 86400
+    if label in WEEKDAY_NAMES:
+        days_ago = (today.tm_wday - WEEKDAY_NAMES.index(label)) % 7 or 7
+        return midnight - days_ago * 86400
+    match = re.fullmatch(r"(\d{1,2})[/.-](\d{1,2})[/.-](\d{2,4})", label)
+    if match:
+        day, month, year = (int(part) for part in match.groups())
+        if month > 12 and day <= 12:
+            day, month = month, day
+        year += 2000 if year < 100 else 0
         try:
-            containers = driver.find_elements(By.CSS_SELECTOR, selector)
-            if containers:
-                print(f"📋 Found {len(containers)} messages with: {selector}")
-                
-                # Get last message
-                for container in reversed(containers):
-                    try:
-                        # Try to find text spans
-                        text_spans = container.find_elements(By.CSS_SELECTOR, "span.selectable-text")
-                        if text_spans:
-                            message = " ".join([span.text for span in text_spans if span.text.strip()])
-                            if message and len(message) > 5:
-                                print(f"✅ Latest message: {message[:100]}...")
-                                return message
-                        
-                        # Fallback: get all text
-                        text = container.text.strip()
-                        if text and len(text) > 5:
-                            print(f"✅ Latest message (fallback): {text[:100]}...")
-                            return text
-                    except:
-                        continue
-        except:
+            return time.mktime((year, month, day, 0, 0, 0, 0, 0, -1))
+        except (OverflowError, ValueError):
+            return None
+    return None
+
+class UnreadScheduler:
+    """Priority queue of chats with unread messages. More unread messages, a
+    longer wait since the newest one and being a known complainant move a chat
+    forward; chats with nothing unread are never queued."""
+    
+    def __init__(self, complainants=None):
+        self.complainants = complainants or set()
+        self.heap = []
+        self.queued = set()
+    
+    def score(self, row, now=None):
+        now = time.time() if now is None else now
+        score = min(row["unread"], SCHEDULER_UNREAD_CAP) * SCHEDULER_UNREAD_WEIGHT
+        stamp = parse_chat_time(row.get("time"), now)
+        if stamp is not None:
+            score += min(max(0, now - stamp) / 3600, SCHEDULER_AGE_CAP_HOURS) * SCHEDULER_AGE_WEIGHT_PER_HOUR
+        if normalize_name(row["title"]) in self.complainants:
+            score += SCHEDULER_COMPLAINANT_BONUS
+        return round(score, 2)
+    
+    def push(self, row, now=None):
+        key = normalize_name(row.get("title"))
+        if not row.get("unread") or not key or key in self.queued:
+            return False
+        self.queued.add(key)
+        chat = {"title": row["title"], "unread": row["unread"], "time": row.get("time"), "priority": self.score(row, now)}
+        # Equal scores keep the chat list's own (most recent first) order
+        heapq.heappush(self.heap, (-chat["priority"], row.get("offset") or 0, key, chat))
+        return True
+    
+    def pop(self):
+        return heapq.heappop(self.heap)[-1]
+    
+    def __len__(self):
+        return len(self.heap)
+
+def scan_unread_chats(driver, max_pages=SCHEDULER_MAX_PAGES, max_age_days=SCHEDULER_SCAN_MAX_AGE_DAYS):
+    """Rows with an unread badge, read one chat list page per snapshot from
+    the top down. The list is sorted by last activity, not unread state, so
+    the scan goes on past pages of read chats and only stops after max_pages
+    or once every row on a page is older than max_age_days. Returns (rows, pages)."""
+    index = get_chat_index()
+    found = {}
+    pages = 0
+    cutoff = time.time() - max_age_days * 86400
+    while True:
+        _, rows = snapshot_chat_list(driver)
+        pages += 1
+        index.observe(rows)
+        for row in rows:
+            if row.get("unread"):
+                found.setdefault(normalize_name(row["title"]), row)
+        stamps = [stamp for stamp in (parse_chat_time(row.get("time")) for row in rows) if stamp is not None]
+        if pages >= max_pages or stamps and max(stamps) < cutoff:
+            break
+        moved = driver.execute_script(
+            "var pane = document.querySelector('#pane-side'); if (!pane) { return false; }"
+            "var top = pane.scrollTop; pane.scrollTop += pane.clientHeight * 0.9; return pane.scrollTop !== top;"
+        )
+        if not moved:
+            break
+        wait_for_dom_quiet(driver, "chat_scroll", "#pane-side")
+    if pages > 1:
+        driver.execute_script("var pane = document.querySelector('#pane-side'); if (pane) { pane.scrollTop = 0; }")
+    return list(found.values()), pages
+
+def extract_unread_messages(driver, max_chats=None, stop=None):
+    """Open chats with an unread badge, most urgent first (up to max_chats,
+    until the stop Event is set), and collect their unread messages"""
+    print("📬 Collecting unread messages...")
+    
+    rows, pages = scan_unread_chats(driver)
+    scheduler = UnreadScheduler(recent_complainants())
+    now = time.time()
+    for row in rows:
+        scheduler.push(row, now)
+    print(f"📋 {len(scheduler)} chat(s) with unread messages ({pages} chat list page(s) scanned)")
+    
+    chats = []
+    while scheduler and (not max_chats or len(chats) < max_chats):
+        if stop is not None and stop.is_set():
+            break
+        chat = scheduler.pop()
+        title, unread = chat["title"], chat["unread"]
+        print(f"⏫ {title}: {unread} unread, last active {chat['time'] or 'unknown'}, priority {chat['priority']}")
+        if not find_and_click_chat_improved(driver, title):
+            print(f"⚠️ Could not open unread chat: '{title}'")
             continue
+        
+        wait_for_dom_quiet(driver, "messages", "#main")
+        contact_info = extract_contact_info(driver)
+        records = extract_messages_since(driver, incoming_only=True, last=unread)
+        print(f"✅ {title}: {len(records)} unread message(s)")
+        chats.append({"title": title, "unread": unread, "contact_info": contact_info, "records": records})
+        return_to_chat_list(driver)
     
-    print("❌ Could not extract message")
-    return "No message found"
+    return chats
 
 def save_data_to_files(contact_info, latest_message):
     """Save extracted data"""
@@ -456,116 +1892,3156 @@ def save_data_to_files(contact_info, latest_message):
         print(f"❌ Error saving: {e}")
         return False
 
-def submit_to_google_form(contact_info, latest_message):
+def create_form_session(pool_size=SUBMIT_WORKERS):
+    """HTTP session with a connection pool sized for the submission workers"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    })
+    return session
+
+_form_session = None
+
+def get_form_session():
+    """Shared pooled session, created on first use"""
+    global _form_session
+    if _form_session is None:
+        _form_session = create_form_session()
+    return _form_session
+
+def build_form_payload(contact_info, latest_message):
+    """Map extracted data onto the Google Form entry ids"""
+    return {
+        FORM_FIELDS["name"]: contact_info['name'],
+        FORM_FIELDS["phone"]: contact_info['phone'],
+        FORM_FIELDS["message"]: latest_message,
+    }
+
+def retry_delay(attempt, response=None, base=None):
+    """Full-jitter exponential backoff, honouring Retry-After when the server sends one"""
+    base = SUBMIT_BACKOFF_SECONDS if base is None else base
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return float(retry_after)
+    return random.uniform(0, base * (2 ** attempt))
+
+def post_form_response(session, payload, form_url=None, max_retries=SUBMIT_MAX_RETRIES, on_retry=None):
+    """POST to the form, retrying 429/5xx and connection errors; returns (ok, status, attempts)"""
+    form_url = form_url or FORM_URL
+    status = None
+    
+    for attempt in range(max_retries + 1):
+        response = None
+        try:
+            response = session.post(form_url, data=payload, timeout=SUBMIT_TIMEOUT)
+            status = response.status_code
+            if status == 200:
+                return True, status, attempt + 1
+            if status != 429 and status < 500:
+                return False, status, attempt + 1
+        except (requests.ConnectionError, requests.Timeout) as e:
+            status = None
+            print(f"⚠️ Form endpoint unreachable: {e}")
+        
+        if attempt < max_retries:
+            delay = retry_delay(attempt, response)
+            print(f"🔁 Retrying form submission in {delay:.1f}s (attempt {attempt + 2}/{max_retries + 1})")
+            count("retries_total", kind="form")
+            if on_retry:
+                on_retry()
+            time.sleep(delay)
+    
+    return False, status, max_retries + 1
+
+@timed("form_submit")
+def submit_to_google_form(contact_info, latest_message, session=None, on_retry=None):
     """Submit extracted data to Google Form"""
     print("\n" + "="*50)
     print("📤 SUBMITTING TO GOOGLE FORM")
     print("="*50)
     
     try:
-        # Google Form URL and field IDs
-        form_url = #add
+        if not FORM_URL or not all(FORM_FIELDS.values()):
+            print("❌ Google Form not configured - set FORM_URL and FORM_FIELDS")
+            return False
         
         # Prepare form data
-        #add your section ids and names
-        payload = {
-            : contact_info['name'],#add you id of section before colon
-            : contact_info['phone'],#add you id of section before colon
-            : latest_message#add you id of section before colon
-        }
+        payload = build_form_payload(contact_info, latest_message)
         
         print(f"📋 Submitting data:")
         print(f"   Name: {contact_info['name']}")
         print(f"   Phone: {contact_info['phone']}")
         print(f"   Message: {latest_message[:50]}...")
         
-        # Create session with headers
-        session = requests.Session()
-        session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-        
-        # Submit to Google Form
-        response = session.post(form_url, data=payload, timeout=30)
+        # Submit to Google Form over the shared connection pool
+        ok, status, attempts = post_form_response(session or get_form_session(), payload, on_retry=on_retry)
         
-        if response.status_code == 200:
+        if ok:
             print("✅ Form submitted successfully!")
             return True
         else:
-            print(f"❌ Form submission failed with status: {response.status_code}")
+            print(f"❌ Form submission failed with status: {status} after {attempts} attempt(s)")
             return False
             
     except Exception as e:
         print(f"❌ Error during form submission: {e}")
         return False
 
-def main():
-    driver = None
+class FormSubmitter:
+    """Submits complaints in the background with bounded concurrency and queue size"""
     
-    try:
-        print("🚀 Starting enhanced WhatsApp scraper with ChromeDriver fixes...")
-        
-        # Fix ChromeDriver issues first
-        fix_chromedriver_issues()
-        
-        # Create driver with multiple fallback methods
-        driver = create_chrome_driver()
-        
-        if not driver:
-            print("❌ Could not create Chrome driver with any method")
-            print("\n🔧 Manual fix suggestions:")
-            print("1. Update Chrome browser to latest version")
-            print("2. Run: pip install --upgrade selenium webdriver-manager")
-            print("3. Clear ChromeDriver cache: Delete ~/.wdm folder")
-            print("4. Download ChromeDriver manually from https://chromedriver.chromium.org/")
-            print("5. Restart your terminal/command prompt")
-            return
-        
-        # Set timeouts
-        driver.set_page_load_timeout(60)
-        driver.implicitly_wait(10)
-        
-        print("🌐 Opening WhatsApp Web...")
-        driver.get("https://web.whatsapp.com")
+    def __init__(self, workers=SUBMIT_WORKERS, queue_size=SUBMIT_QUEUE_SIZE):
+        self.session = create_form_session(workers)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="form-submit")
+        self.slots = threading.BoundedSemaphore(queue_size)
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=1000)
+        self.stats = {"queued": 0, "in_flight": 0, "submitted": 0, "failed": 0, "retries": 0}
+    
+    def submit(self, contact_info, latest_message, callback=None):
+        """Queue a submission; blocks when the queue is full. Returns a Future of the bool result"""
+        self.slots.acquire()
+        with self.lock:
+            self.stats["queued"] += 1
+        return self.executor.submit(self._run, dict(contact_info), latest_message, callback)
+    
+    def _count_retry(self):
+        with self.lock:
+            self.stats["retries"] += 1
+    
+    def _run(self, contact_info, latest_message, callback):
+        with self.lock:
+            self.stats["queued"] -= 1
+            self.stats["in_flight"] += 1
+        start = time.time()
+        ok = False
+        try:
+            ok = submit_to_google_form(contact_info, latest_message, self.session, self._count_retry)
+            return ok
+        finally:
+            with self.lock:
+                self.stats["in_flight"] -= 1
+                self.stats["submitted" if ok else "failed"] += 1
+                self.latencies.append(time.time() - start)
+            self.slots.release()
+            if callback:
+                try:
+                    callback(contact_info, latest_message, ok)
+                except Exception as e:
+                    print(f"⚠️ Submission callback failed: {e}")
+    
+    def queue_depth(self):
+        with self.lock:
+            return self.stats["queued"] + self.stats["in_flight"]
+    
+    def latency_percentile(self, percentile):
+        with self.lock:
+            latencies = sorted(self.latencies)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percentile / 100))]
+    
+    def close(self):
+        """Wait for every queued submission to finish"""
+        self.executor.shutdown(wait=True)
+        self.session.close()
+    
+    def print_stats(self):
+        p50, p95 = self.latency_percentile(50), self.latency_percentile(95)
+        print(f"📤 Form submitter: {self.stats['submitted']} submitted | {self.stats['failed']} failed | "
+              f"{self.stats['retries']} retries | queue depth {self.queue_depth()} | "
+              f"p50 {p50 or 0:.2f}s | p95 {p95 or 0:.2f}s")
+
+_form_submitter = None
+
+def get_form_submitter():
+    """Shared background submitter, created on first use"""
+    global _form_submitter
+    if _form_submitter is None:
+        _form_submitter = FormSubmitter()
+    return _form_submitter
+
+def close_form_submitter():
+    """Drain and stop the shared submitter, printing its metrics"""
+    global _form_submitter
+    if _form_submitter is not None:
+        print("⏳ Waiting for pending form submissions...")
+        _form_submitter.close()
+        _form_submitter.print_stats()
+        _form_submitter = None
+
+def resolve_submissions(results):
+    """Replace queued submission futures in batch results with their outcome"""
+    for result in results:
+        future = result.get("form_submitted")
+        if hasattr(future, "result"):
+            try:
+                result["form_submitted"] = future.result()
+            except Exception as e:
+                result["form_submitted"] = False
+                result["error"] = result["error"] or str(e)
+    return results
+
+class StubFormHandler(BaseHTTPRequestHandler):
+    """Plays a Google Form formResponse endpoint for local testing"""
+    
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8")
+        with server.lock:
+            server.requests_seen += 1
+            fail = server.fail_rate and random.random() < server.fail_rate
+            if not fail:
+                server.submissions.append({key: values[0] for key, values in parse_qs(body).items()})
+        if server.delay:
+            time.sleep(server.delay)
         
-        if not wait_for_whatsapp_load(driver):
-            print("❌ Failed to load WhatsApp Web")
-            return
+        status = random.choice([429, 503]) if fail else 200
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html")
+        self.end_headers()
+        self.wfile.write(b"<html><body>Your response has been recorded.</body></html>")
+    
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_form_server(port=0, delay=0.0, fail_rate=0.0):
+    """Serve StubFormHandler on localhost in a thread; returns (server, formResponse url)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubFormHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.delay = delay
+    server.fail_rate = fail_rate
+    server.requests_seen = 0
+    server.submissions = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/forms/d/e/stub/formResponse"
+    print(f"🧪 Stub Google Form listening on {url}")
+    return server, url
+
+def use_stub_form(delay=0.0, fail_rate=0.0):
+    """Point FORM_URL/FORM_FIELDS at a local stub endpoint"""
+    global FORM_URL
+    server, FORM_URL = start_stub_form_server(delay=delay, fail_rate=fail_rate)
+    for field, entry_id in zip(FORM_FIELDS, ("entry.1", "entry.2", "entry.3")):
+        FORM_FIELDS[field] = FORM_FIELDS[field] or entry_id
+    return server
+
+def benchmark_submitter(count, workers=SUBMIT_WORKERS, delay=0.2, fail_rate=0.1):
+    """Push count fake complaints through FormSubmitter against the stub form"""
+    server = use_stub_form(delay, fail_rate)
+    submitter = FormSubmitter(workers=workers)
+    
+    start = time.time()
+    futures = [
+        submitter.submit({"name": f"Customer {i}", "phone": "03001234567"}, f"Benchmark complaint {i}")
+        for i in range(count)
+    ]
+    ok = sum(1 for future in futures if future.result())
+    elapsed = time.time() - start
+    submitter.close()
+    server.shutdown()
+    
+    print("\n" + "="*50)
+    print(f"📊 Submitted {ok}/{count} in {elapsed:.2f}s ({count / elapsed:.1f}/s) with {workers} workers")
+    print(f"   Stub saw {server.requests_seen} requests, recorded {len(server.submissions)}")
+    submitter.print_stats()
+    print("="*50)
+
+# Stand-in for a logged-in WhatsApp Web with the DOM the scraper targets:
+# #pane-side, a [data-testid='chat-list'] of div[role='listitem'] rows
+# (virtualized like the real list), and chats that open on click with
+# msg-container rows and span.selectable-text. __CONFIG__ becomes JSON.
+FAKE_WHATSAPP_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>WhatsApp</title>
+<style>
+html, body { margin: 0; height: 100%; font-family: sans-serif; }
+#app { display: flex; height: 100vh; }
+#side { width: 420px; display: flex; flex-direction: column; border-right: 1px solid #ddd; }
+#side > header, #main > header { height: 60px; line-height: 60px; padding: 0 16px; background: #f0f2f5; }
+#pane-side { flex: 1; overflow-y: auto; position: relative; }
+[data-testid='chat-list'] { position: relative; }
+div[role='listitem'] { position: absolute; left: 0; right: 0; height: 72px; border-bottom: 1px solid #eee; cursor: pointer; }
+div[role='listitem'] > div { padding: 12px 16px; }
+.row-top, .row-bottom { display: flex; justify-content: space-between; overflow: hidden; white-space: nowrap; }
+.badge { background: #25d366; color: #fff; border-radius: 10px; padding: 0 6px; }
+#main { flex: 1; display: flex; flex-direction: column; }
+[data-testid='conversation-panel-body'] { flex: 1; overflow-y: auto; padding: 8px 40px; background: #efeae2; }
+.message-in, .message-out { margin: 4px 0; padding: 6px 8px; border-radius: 8px; max-width: 65%; }
+.message-in { background: #fff; }
+.message-out { background: #d9fdd3; margin-left: auto; }
+footer { height: 56px; background: #f0f2f5; }
+[data-testid='contact-info-drawer'] { position: fixed; top: 0; right: 0; width: 360px; height: 100%; background: #fff; }
+</style>
+</head>
+<body>
+<div id="app">
+  <div id="side">
+    <header>Chats</header>
+    <div id="pane-side"></div>
+  </div>
+</div>
+<script>
+var CONFIG = __CONFIG__;
+var ROW_HEIGHT = 72, OVERSCAN = 6;
+var pane = document.getElementById('pane-side');
+var list = document.createElement('div');
+var chats = [], rendered = {};
+
+function pad(value, width) { value = String(value); while (value.length < width) { value = '0' + value; } return value; }
+function esc(text) {
+    return String(text).replace(/[&<>"]/g, function (c) {
+        return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c];
+    });
+}
+// Every third message from the end is our reply, so the last one is incoming
+function incomingAt(j) { return (CONFIG.messages - 1 - j) % 3 !== 1; }
+function messageText(i, j) {
+    return incomingAt(j) ? CONFIG.samples[(i + j) % CONFIG.samples.length] : 'Thank you, your complaint has been noted.';
+}
+// Last-activity labels the way WhatsApp shows them, newest first: times
+// today, then Yesterday, weekdays and dates
+var WEEKDAYS = ['Friday', 'Thursday', 'Wednesday', 'Tuesday', 'Monday'];
+function chatTime(i) {
+    if (i < 40) { var minutes = 23 * 60 + 59 - i * 30; return pad(Math.floor(minutes / 60), 2) + ':' + pad(minutes % 60, 2); }
+    if (i < 80) { return 'Yesterday'; }
+    if (i < 200) { return WEEKDAYS[Math.floor((i - 80) / 24)]; }
+    return pad(1 + i % 28, 2) + '/' + pad(1 + Math.floor(i / 28) % 12, 2) + '/2025';
+}
+// Every lid_every-th chat has a privacy id instead of its number, so its
+// phone is only shown in the contact info drawer
+for (var i = 0; i < CONFIG.chats; i++) {
+    var lid = CONFIG.lid_every && i % CONFIG.lid_every === 0;
+    chats.push({name: 'Customer ' + pad(i, 4), id: lid ? '1' + pad(i, 14) + '@lid' : '92300' + pad(i, 7) + '@c.us',
+                phone: '+92 300 ' + pad(i, 7),
+                unread: CONFIG.unread_every && i % CONFIG.unread_every === 0 ? 1 + i % 3 : 0,
+                preview: messageText(i, CONFIG.messages - 1), time: chatTime(i), messages: null});
+}
+
+function messagesFor(i) {
+    var chat = chats[i];
+    if (!chat.messages) {
+        chat.messages = [];
+        for (var j = 0; j < CONFIG.messages; j++) {
+            chat.messages.push({id: (incomingAt(j) ? 'false_' : 'true_') + chat.id + '_' + pad(j, 6),
+                                incoming: incomingAt(j), text: messageText(i, j),
+                                time: pad(9 + Math.floor(j / 60) % 12, 2) + ':' + pad(j % 60, 2)});
+        }
+    }
+    return chat.messages;
+}
+function rowHtml(i) {
+    var chat = chats[i];
+    var badge = chat.unread ? '<span class="badge" aria-label="' + chat.unread + ' unread messages">' + chat.unread + '</span>' : '';
+    return '<div data-id="' + chat.id + '" tabindex="-1">' +
+        '<div class="row-top"><span dir="auto" title="' + esc(chat.name) + '">' + esc(chat.name) + '</span><span>' + chat.time + '</span></div>' +
+        '<div class="row-bottom"><span dir="ltr" title="' + esc(chat.preview) + '">' + esc(chat.preview) + '</span>' + badge + '</div></div>';
+}
+// Keeps only the rows around the viewport in the DOM; rows that stay in
+// range keep their element so references to them do not go stale
+function renderRows() {
+    var first = 0, last = chats.length - 1;
+    if (CONFIG.virtual) {
+        first = Math.max(0, Math.floor(pane.scrollTop / ROW_HEIGHT) - OVERSCAN);
+        last = Math.min(chats.length - 1, Math.ceil((pane.scrollTop + pane.clientHeight) / ROW_HEIGHT) + OVERSCAN);
+    }
+    Object.keys(rendered).forEach(function (key) {
+        var index = Number(key);
+        if (index < first || index > last) { list.removeChild(rendered[key]); delete rendered[key]; }
+    });
+    for (var i = first; i <= last; i++) {
+        if (rendered[i]) { continue; }
+        var row = document.createElement('div');
+        row.setAttribute('role', 'listitem');
+        row.setAttribute('data-index', i);
+        row.style.top = i * ROW_HEIGHT + 'px';
+        row.innerHTML = rowHtml(i);
+        list.appendChild(row);
+        rendered[i] = row;
+    }
+}
+
+function messageHtml(chat, message) {
+    var sender = message.incoming ? chat.name : 'Complaint Desk';
+    return '<div role="row"><div data-id="' + message.id + '" data-testid="msg-container">' +
+        '<div class="' + (message.incoming ? 'message-in' : 'message-out') + '">' +
+        '<div class="copyable-text" data-pre-plain-text="[' + message.time + ', 16/10/2026] ' + esc(sender) + ': ">' +
+        '<span class="selectable-text copyable-text" dir="ltr"><span>' + esc(message.text) + '</span></span>' +
+        '</div></div></div></div>';
+}
+function closeDrawer() {
+    var drawer = document.querySelector("[data-testid='contact-info-drawer']");
+    if (!drawer) { return false; }
+    drawer.parentNode.removeChild(drawer);
+    return true;
+}
+function openDrawer(i) {
+    closeDrawer();
+    var chat = chats[i];
+    var drawer = document.createElement('div');
+    drawer.setAttribute('data-testid', 'contact-info-drawer');
+    drawer.innerHTML = '<header>Contact info</header><section><div>' + esc(chat.name) + '</div>' +
+        '<div><span class="selectable-text copyable-text" dir="auto">' + chat.phone + '</span></div></section>';
+    document.getElementById('app').appendChild(drawer);
+}
+function closeChat() {
+    closeDrawer();
+    var main = document.getElementById('main');
+    if (main) { main.parentNode.removeChild(main); }
+    window.fakeOpenChat = null;
+}
+function openChat(i) {
+    closeChat();
+    var chat = chats[i];
+    chat.unread = 0;
+    var badge = rendered[i] && rendered[i].querySelector('.badge');
+    if (badge) { badge.parentNode.removeChild(badge); }
+    var main = document.createElement('div');
+    main.id = 'main';
+    main.innerHTML = '<header data-testid="conversation-info-header"><span dir="auto" title="' + esc(chat.name) + '">' +
+        esc(chat.name) + '</span></header><div data-testid="conversation-panel-body"></div>' +
+        '<footer data-testid="compose-panel"><div contenteditable="true" title="Type a message"></div></footer>';
+    var body = main.querySelector("[data-testid='conversation-panel-body']");
+    body.innerHTML = messagesFor(i).map(function (message) { return messageHtml(chat, message); }).join('');
+    main.querySelector('header').addEventListener('click', function () { openDrawer(i); });
+    document.getElementById('app').appendChild(main);
+    body.scrollTop = body.scrollHeight;
+    window.fakeOpenChat = i;
+}
+// Test hook: deliver a new incoming message to chat i, returns its data-id
+window.fakeIncoming = function (i, text) {
+    var chat = chats[i], messages = messagesFor(i);
+    var message = {id: 'false_' + chat.id + '_' + pad(messages.length, 6), incoming: true, text: text, time: '11:00'};
+    messages.push(message);
+    var now = new Date();
+    chat.preview = text;
+    chat.time = pad(now.getHours(), 2) + ':' + pad(now.getMinutes(), 2);
+    if (window.fakeOpenChat === i) {
+        var body = document.querySelector("[data-testid='conversation-panel-body']");
+        body.insertAdjacentHTML('beforeend', messageHtml(chat, message));
+        body.scrollTop = body.scrollHeight;
+    } else {
+        chat.unread += 1;
+        if (rendered[i]) { rendered[i].innerHTML = rowHtml(i); }
+    }
+    return message.id;
+};
+
+list.setAttribute('aria-label', 'Chat list');
+list.setAttribute('data-testid', 'chat-list');
+list.setAttribute('role', 'grid');
+list.style.height = chats.length * ROW_HEIGHT + 'px';
+list.addEventListener('click', function (event) {
+    var row = event.target.closest("div[role='listitem']");
+    if (row) { openChat(Number(row.getAttribute('data-index'))); }
+});
+// Escape closes the contact info drawer first, then the chat
+document.addEventListener('keydown', function (event) {
+    if (event.key === 'Escape' && !closeDrawer()) { closeChat(); }
+});
+pane.addEventListener('scroll', renderRows);
+// The chat list shows up a little after the page, like the real app
+setTimeout(function () { pane.appendChild(list); renderRows(); }, CONFIG.load_ms);
+</script>
+</body>
+</html>
+"""
+
+class FakeWhatsAppHandler(BaseHTTPRequestHandler):
+    """Serves the fake WhatsApp Web page for local end to end runs"""
+    
+    def do_GET(self):
+        page = self.server.page
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(page)))
+        self.end_headers()
+        self.wfile.write(page)
+    
+    def log_message(self, format, *args):
+        pass
+
+def fake_chat_name(index):
+    """Title of chat number index on the fake WhatsApp page"""
+    return f"Customer {index:04d}"
+
+def build_fake_whatsapp_page(chats=200, messages=20, virtual=True, unread_every=7, lid_every=5, load_ms=500):
+    """Render FAKE_WHATSAPP_HTML for the given number of chats and messages per chat"""
+    config = {
+        "chats": chats,
+        "messages": max(1, messages),
+        "virtual": virtual,
+        "unread_every": unread_every,
+        "lid_every": lid_every,
+        "load_ms": load_ms,
+        "samples": EXTRACTOR_SAMPLES,
+    }
+    return FAKE_WHATSAPP_HTML.replace("__CONFIG__", json.dumps(config)).encode("utf-8")
+
+def start_fake_whatsapp_server(chats=200, messages=20, port=0, **page_options):
+    """Serve the fake WhatsApp page on localhost in a thread; returns (server, url)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeWhatsAppHandler)
+    server.daemon_threads = True
+    server.page = build_fake_whatsapp_page(chats, messages, **page_options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    print(f"🧪 Fake WhatsApp Web with {chats} chats listening on {url}")
+    return server, url
+
+class WebDriverCallCounter:
+    """Counts WebDriver commands by wrapping driver.execute, which element
+    methods (.text, .click(), get_attribute ...) go through as well"""
+    
+    def __init__(self, driver):
+        self.driver = driver
+        self.counts = Counter()
+        self._execute = driver.execute
+        driver.execute = self.execute
+    
+    def execute(self, driver_command, params=None):
+        self.counts[driver_command] += 1
+        return self._execute(driver_command, params)
+    
+    def take(self):
+        """Counts since the last take(); starts again from zero"""
+        counts, self.counts = self.counts, Counter()
+        return counts
+    
+    def remove(self):
+        # Put back whatever was there before, e.g. the profiler's wrapper
+        self.driver.execute = self._execute
+
+class WebDriverProfiler:
+    """Opt-in (--profile-webdriver) record of every WebDriver command: which
+    of this script's functions issued it, the roundtrip time and the bytes
+    sent and received. Attached to each driver as it is created."""
+    
+    def __init__(self, path):
+        self.path = path
+        self.filename = __file__
+        # Frames of the timed() decorator only add noise to the stacks
+        self.skip_codes = {timed("profiler")(lambda: None).__code__}
+        self.lock = threading.Lock()
+        # caller stack + command -> [calls, microseconds]
+        self.stacks = {}
+        self.functions = {}
+        self.commands = 0
+        self.seconds = 0.0
+    
+    def attach(self, driver):
+        execute = driver.execute
         
-        contact_name =   # CHANGE THIS to name you want
+        def profiled_execute(driver_command, params=None):
+            start = time.perf_counter()
+            response = None
+            try:
+                response = execute(driver_command, params)
+                return response
+            finally:
+                self.record(driver_command, params, response, time.perf_counter() - start, sys._getframe(1))
         
-        if not find_and_click_chat_improved(driver, contact_name):
-            print(f"❌ Could not find/click chat: '{contact_name}'")
-            
-            # Debug: Save screenshot
-            driver.save_screenshot("debug_screenshot.png")
-            print("📸 Screenshot saved as debug_screenshot.png")
-            
-            # Keep browser open for manual inspection
-            input("❓ Press Enter to close browser (check it manually first)...")
+        driver.execute = profiled_execute
+    
+    def caller_stack(self, frame):
+        """Names of this script's functions on the stack, outermost first"""
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            if code.co_filename == self.filename and code not in self.skip_codes:
+                names.append(code.co_name)
+            frame = frame.f_back
+        names.reverse()
+        return tuple(names) or ("<unknown>",)
+    
+    @staticmethod
+    def payload_size(value):
+        if value is None:
+            return 0
+        try:
+            return len(json.dumps(value, ensure_ascii=False, default=str))
+        except ValueError:
+            return 0
+    
+    def record(self, command, params, response, seconds, frame):
+        stack = self.caller_stack(frame)
+        value = response.get("value") if isinstance(response, dict) else response
+        size = self.payload_size(params) + self.payload_size(value)
+        with self.lock:
+            self.commands += 1
+            self.seconds += seconds
+            totals = self.stacks.setdefault(stack + (command,), [0, 0])
+            totals[0] += 1
+            totals[1] += max(1, round(seconds * 1000000))
+            stats = self.functions.get(stack[-1])
+            if stats is None:
+                stats = self.functions[stack[-1]] = {"calls": 0, "seconds": 0.0, "bytes": 0, "commands": Counter()}
+            stats["calls"] += 1
+            stats["seconds"] += seconds
+            stats["bytes"] += size
+            stats["commands"][command] += 1
+    
+    def write(self):
+        """Collapsed stacks ("main;run_batch;...;command weight") for flamegraph.pl,
+        speedscope or inferno: path is weighted by microseconds, the .calls file by calls"""
+        root, ext = os.path.splitext(self.path)
+        calls_path = f"{root}.calls{ext or '.folded'}"
+        with self.lock:
+            stacks = sorted(self.stacks.items())
+        for path, index in ((self.path, 1), (calls_path, 0)):
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, totals in stacks:
+                    f.write(f"{';'.join(stack)} {totals[index]}\n")
+        return self.path, calls_path
+    
+    def print_stats(self, top=15):
+        if not self.commands:
+            print("🔬 WebDriver profile: no commands recorded")
             return
-        
-        contact_info = extract_contact_info(driver)
-        latest_message = extract_latest_message(driver)
-        
-        save_data_to_files(contact_info, latest_message)
-        
-        # NEW: Submit to Google Form
-        form_success = submit_to_google_form(contact_info, latest_message)
-        
-        print("\n" + "="*50)
-        print("📊 EXTRACTION SUMMARY")
+        print(f"\n🔬 WebDriver commands: {self.commands} in {self.seconds:.2f}s (calls / time / payload by caller):")
+        with self.lock:
+            functions = sorted(self.functions.items(), key=lambda item: item[1]["calls"], reverse=True)
+        for name, stats in functions[:top]:
+            commands = ", ".join(f"{command} {calls}" for command, calls in stats["commands"].most_common(3))
+            print(f"   {name}: {stats['calls']} / {stats['seconds']:.2f}s / {stats['bytes'] / 1024:.1f} KB - {commands}")
+        if len(functions) > top:
+            print(f"   ... {len(functions) - top} more caller(s) in {self.path}")
+
+_webdriver_profiler = None
+
+def enable_webdriver_profiler(path):
+    """Profile every driver created from now on; the stacks are written on close"""
+    global _webdriver_profiler
+    _webdriver_profiler = WebDriverProfiler(path)
+    return _webdriver_profiler
+
+def close_webdriver_profiler():
+    """Write the collapsed stacks and print the per-function summary"""
+    global _webdriver_profiler
+    if _webdriver_profiler is None:
+        return
+    _webdriver_profiler.print_stats()
+    try:
+        by_time, by_calls = _webdriver_profiler.write()
+        print(f"🔥 Collapsed stacks: {by_time} (microseconds), {by_calls} (calls)")
+    except OSError as e:
+        print(f"⚠️ Could not write WebDriver profile: {e}")
+    _webdriver_profiler = None
+
+def run_bench_case(counter, action, repeats, setup=None):
+    """Time action() repeats times; returns median/min seconds, WebDriver calls per run and success rate"""
+    durations = []
+    calls = Counter()
+    ok = 0
+    for _ in range(repeats):
+        with contextlib.redirect_stdout(io.StringIO()):
+            if setup:
+                setup()
+            counter.take()
+            start = time.perf_counter()
+            ok += bool(action())
+            durations.append(time.perf_counter() - start)
+        calls.update(counter.take())
+    
+    durations.sort()
+    return {
+        "median_seconds": round(durations[len(durations) // 2], 4),
+        "min_seconds": round(durations[0], 4),
+        "webdriver_calls": round(sum(calls.values()) / repeats, 1),
+        "commands": {command: round(count / repeats, 1) for command, count in calls.most_common()},
+        "success_rate": round(ok / repeats, 2),
+    }
+
+def compare_bench_baseline(cases, baseline, tolerance=BENCH_REGRESSION_TOLERANCE):
+    """Cases that got slower, issue more WebDriver calls or fail more often than the baseline"""
+    regressions = []
+    for name, case in cases.items():
+        base = baseline.get("cases", {}).get(name)
+        if not base:
+            continue
+        if case["median_seconds"] > base["median_seconds"] * (1 + tolerance) + BENCH_MIN_SLACK_SECONDS:
+            regressions.append(f"{name}: median {base['median_seconds']}s -> {case['median_seconds']}s")
+        if case["webdriver_calls"] > base["webdriver_calls"] * (1 + tolerance):
+            regressions.append(f"{name}: WebDriver calls {base['webdriver_calls']} -> {case['webdriver_calls']}")
+        if case["success_rate"] < base["success_rate"]:
+            regressions.append(f"{name}: success rate {base['success_rate']} -> {case['success_rate']}")
+    return regressions
+
+def benchmark_scraper(sizes=BENCH_SIZES, messages=20, repeats=3, profile="lean", update_baseline=False):
+    """Time the chat lookup and extraction functions against the fake WhatsApp
+    page for each chat list size and check the results against BENCH_BASELINE_PATH;
+    returns False when a case regressed"""
+    global WHATSAPP_URL, CHAT_INDEX_PATH, SELECTOR_STATS_PATH, CONTACT_CACHE_PATH
+    global _chat_index, _selector_resolver, _contact_cache
+    saved_url = WHATSAPP_URL
+    saved_paths = CHAT_INDEX_PATH, SELECTOR_STATS_PATH, CONTACT_CACHE_PATH
+    bench_dir = tempfile.mkdtemp(prefix="complaint-bench-")
+    # Baselines must not depend on this machine's warm caches
+    CHAT_INDEX_PATH = os.path.join(bench_dir, "chat-index.json")
+    SELECTOR_STATS_PATH = os.path.join(bench_dir, "selector-stats.json")
+    CONTACT_CACHE_PATH = os.path.join(bench_dir, "contact-cache.json")
+    _chat_index = _selector_resolver = _contact_cache = None
+    
+    def cold_index():
+        global _chat_index
+        _chat_index = None
+        if os.path.exists(CHAT_INDEX_PATH):
+            os.remove(CHAT_INDEX_PATH)
+    
+    cases = {}
+    driver = create_chrome_driver(profile, os.path.join(bench_dir, "chrome-data"))
+    if not driver:
+        print("❌ Could not create Chrome driver for the benchmark")
+        return False
+    counter = WebDriverCallCounter(driver)
+    
+    try:
+        for size in sizes:
+            server, WHATSAPP_URL = start_fake_whatsapp_server(size, messages, load_ms=0)
+            try:
+                if not open_whatsapp(driver):
+                    print(f"❌ Fake WhatsApp page with {size} chats did not load")
+                    continue
+                top, bottom = fake_chat_name(min(1, size - 1)), fake_chat_name(size - 1)
+                
+                def fresh_list():
+                    cold_index()
+                    return_to_chat_list(driver)
+                
+                def open_top():
+                    return_to_chat_list(driver)
+                    find_and_click_chat_improved(driver, top)
+                
+                runs = [
+                    ("find_and_click_chat_improved/top", fresh_list,
+                     lambda: find_and_click_chat_improved(driver, top)),
+                    ("find_and_click_chat_improved/bottom", fresh_list,
+                     lambda: find_and_click_chat_improved(driver, bottom)),
+                    # The previous case left the bottom chat in the chat index
+                    ("find_and_click_chat_improved/bottom-indexed", lambda: return_to_chat_list(driver),
+                     lambda: find_and_click_chat_improved(driver, bottom)),
+                    ("scroll_and_find_chat/bottom", fresh_list,
+                     lambda: scroll_and_find_chat(driver, bottom)),
+                    ("extract_contact_info", open_top,
+                     lambda: extract_contact_info(driver)["name"] != "Unknown"),
+                    ("extract_latest_message", open_top,
+                     lambda: extract_latest_message(driver) != "No message found"),
+                ]
+                for name, setup, action in runs:
+                    case = run_bench_case(counter, action, repeats, setup)
+                    cases[f"{size}/{name}"] = case
+                    print(f"⏱️ {size:>5} chats | {name:<45} {case['median_seconds'] * 1000:8.1f} ms | "
+                          f"{case['webdriver_calls']:6.1f} calls | ok {case['success_rate']:.0%}")
+            finally:
+                server.shutdown()
+    finally:
+        counter.remove()
+        driver.quit()
+        _chat_index = _selector_resolver = _contact_cache = None
+        WHATSAPP_URL = saved_url
+        CHAT_INDEX_PATH, SELECTOR_STATS_PATH, CONTACT_CACHE_PATH = saved_paths
+        shutil.rmtree(bench_dir, ignore_errors=True)
+    
+    results = {
+        "measured_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "profile": profile,
+        "messages": messages,
+        "repeats": repeats,
+        "cases": cases,
+    }
+    try:
+        with open(BENCH_BASELINE_PATH, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        baseline = None
+    
+    print("\n" + "="*50)
+    print("📊 SCRAPER BENCHMARK")
+    print("="*50)
+    # A case that fails only times its failure path, so it can't be a baseline
+    failing = [name for name, case in cases.items() if case["success_rate"] < 1]
+    if failing:
+        for name in failing:
+            print(f"   ❌ {name}: ok {cases[name]['success_rate']:.0%}")
+        print(f"❌ {len(failing)} case(s) did not succeed on every run; baseline not written or compared")
         print("="*50)
-        print(f"Contact: {contact_info['name']}")
-        print(f"Phone: {contact_info['phone']}")
-        print(f"Message: {latest_message[:100]}...")
-        print(f"Google Form: {'SUBMITTED ✅' if form_success else 'FAILED ❌'}")
+        return False
+    if baseline is None or update_baseline:
+        tmp_path = BENCH_BASELINE_PATH + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        os.replace(tmp_path, BENCH_BASELINE_PATH)
+        print(f"📌 Baseline with {len(cases)} cases written to {BENCH_BASELINE_PATH}")
         print("="*50)
+        return True
+    
+    regressions = compare_bench_baseline(cases, baseline)
+    print(f"Compared {len(cases)} cases with the baseline from {baseline.get('measured_at', 'unknown')}")
+    for regression in regressions:
+        print(f"   ❌ {regression}")
+    if not regressions:
+        print("✅ No regressions")
+    print("="*50)
+    return not regressions
+
+def complaint_key(contact_info, message):
+    """Idempotency key for a complaint: same contact + same text = same key"""
+    raw = f"{normalize_name(contact_info.get('name'))}\n{contact_info.get('phone', '')}\n{' '.join(message.split())}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+class ComplaintOutbox:
+    """Append-only, segmented JSONL log of complaints and their delivery state"""
+    
+    def __init__(self, directory=OUTBOX_DIR):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.complaints = {}
+        self.segment_keys = {}
+        # Keys handed to the submitter and not yet marked submitted/failed
+        self.in_flight = set()
+        self.file = None
+        self.segment = None
+        self.segment_lines = 0
+        self.unsynced = 0
+        self.last_sync = time.time()
+        self._load()
+        self._open_segment()
+    
+    def _segments(self):
+        return sorted(glob.glob(os.path.join(self.directory, "segment-*.jsonl")))
+    
+    def _apply(self, entry, segment):
+        key = entry["key"]
+        complaint = self.complaints.setdefault(key, {"state": None, "data": None, "attempts": 0})
+        complaint["state"] = entry["state"]
+        if entry.get("data"):
+            complaint["data"] = entry["data"]
+        if entry["state"] == "failed":
+            complaint["attempts"] += 1
+        self.segment_keys.setdefault(segment, set()).add(key)
+    
+    def _load(self):
+        for segment in self._segments():
+            self.segment_lines = 0
+            with open(segment, "r", encoding="utf-8") as f:
+                for line in f:
+                    self.segment_lines += 1
+                    try:
+                        self._apply(json.loads(line), segment)
+                    except (ValueError, KeyError):
+                        # Torn last line after a crash
+                        continue
+            self.segment = segment
+    
+    def _open_segment(self):
+        if self.segment is None or self.segment_lines >= OUTBOX_SEGMENT_RECORDS:
+            segments = self._segments()
+            number = int(os.path.basename(segments[-1])[len("segment-"):-len(".jsonl")]) + 1 if segments else 1
+            self.segment = os.path.join(self.directory, f"segment-{number:06d}.jsonl")
+            self.segment_lines = 0
+        self.file = open(self.segment, "a", encoding="utf-8")
+        if self.file.tell() > 0:
+            with open(self.segment, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+            if torn:
+                # Finish a line torn by a crash so the next record starts on its own line
+                self.file.write("\n")
+                self.file.flush()
+    
+    def _sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.last_sync = time.time()
+    
+    def _append(self, entry):
+        entry["ts"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.file.flush()
+        self._apply(entry, self.segment)
+        self.segment_lines += 1
+        self.unsynced += 1
+        if self.unsynced >= OUTBOX_FSYNC_EVERY or time.time() - self.last_sync >= OUTBOX_FSYNC_SECONDS:
+            self._sync()
+        if self.segment_lines >= OUTBOX_SEGMENT_RECORDS:
+            self._sync()
+            self.file.close()
+            self._open_segment()
+    
+    def record_extracted(self, contact_info, message, raw=None):
+        """Log a new complaint; returns its key, or None if it was already submitted or is being submitted
+
+        raw=(contact_info, message) as scraped marks a complaint whose fields
+        the LLM has yet to fill in (see update_extracted); it is then keyed on
+        the raw message and kept for a replay to ask the model again.
+        """
+        key = complaint_key(*raw) if raw else complaint_key(contact_info, message)
+        with self.lock:
+            complaint = self.complaints.get(key)
+            if complaint and complaint["state"] == "submitted" or key in self.in_flight:
+                return None
+            if not complaint:
+                data = {"contact_info": dict(contact_info), "message": message}
+                if raw:
+                    data["llm_pending"] = {"contact_info": dict(raw[0]), "message": raw[1]}
+                self._append({"key": key, "state": "extracted", "data": data})
+            self.in_flight.add(key)
+        return key
+    
+    def update_extracted(self, key, contact_info, message):
+        """Replace a logged complaint's data once the LLM has filled in its fields"""
+        with self.lock:
+            self._append({
+                "key": key,
+                "state": "extracted",
+                "data": {"contact_info": dict(contact_info), "message": message},
+            })
+    
+    def mark_submitted(self, key):
+        with self.lock:
+            self.in_flight.discard(key)
+            self._append({"key": key, "state": "submitted"})
+    
+    def mark_failed(self, key, error=None):
+        with self.lock:
+            self.in_flight.discard(key)
+            self._append({"key": key, "state": "failed", "error": error})
+    
+    def pending(self, claim=False):
+        """Complaints still waiting for delivery and not being submitted, as (key, data) pairs
+
+        With claim=True they are marked in flight until mark_submitted/mark_failed.
+        """
+        with self.lock:
+            pending = [
+                (key, complaint["data"]) for key, complaint in self.complaints.items()
+                if complaint["data"] and key not in self.in_flight
+                and (complaint["state"] == "extracted"
+                     or complaint["state"] == "failed" and complaint["attempts"] < OUTBOX_MAX_ATTEMPTS)
+            ]
+            if claim:
+                self.in_flight.update(key for key, _ in pending)
+            return pending
+    
+    def compact(self):
+        """Delete closed segments whose complaints are all delivered (or given up on)"""
+        removed = 0
+        removed_keys = set()
+        with self.lock:
+            for segment, keys in list(self.segment_keys.items()):
+                if segment == self.segment:
+                    continue
+                done = all(
+                    self.complaints[key]["state"] == "submitted"
+                    or self.complaints[key]["attempts"] >= OUTBOX_MAX_ATTEMPTS
+                    for key in keys
+                )
+                if done:
+                    os.remove(segment)
+                    del self.segment_keys[segment]
+                    removed += 1
+                    removed_keys |= keys
+            # Forget complaints with no record left on disk so memory stays bounded
+            for key in removed_keys - set().union(*self.segment_keys.values()):
+                del self.complaints[key]
+        if removed:
+            print(f"🧹 Outbox: compacted {removed} delivered segment(s)")
+        return removed
+    
+    def close(self):
+        with self.lock:
+            if self.file and not self.file.closed:
+                self._sync()
+                self.file.close()
+
+_outbox = None
+
+def get_outbox():
+    """Shared outbox, opened on first use"""
+    global _outbox
+    if _outbox is None:
+        _outbox = ComplaintOutbox(OUTBOX_DIR)
+    return _outbox
+
+def close_outbox():
+    """Compact delivered segments and fsync the outbox"""
+    global _outbox
+    if _outbox is not None:
+        _outbox.compact()
+        _outbox.close()
+        _outbox = None
+
+def normalize_complaint_text(text):
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(re.sub(r"[^\w\s]", " ", (text or "").lower()).split())
+
+def simhash(text, bits=64):
+    """64-bit SimHash over words and word pairs"""
+    words = text.split()
+    features = words + [" ".join(words[i:i + 2]) for i in range(len(words) - 1)]
+    weights = [0] * bits
+    for feature in features:
+        value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(bits):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(bits) if weights[bit] > 0)
+
+class ComplaintDeduplicator:
+    """Exact-hash + SimHash index of recent complaints, scoped per contact
+
+    SimHashes are split into 8 bands of 8 bits; two hashes within 7 bits of
+    each other always share a band, so a lookup only compares the few
+    entries of the same contact in matching bands. Entries expire after the window and the
+    least recently seen ones are evicted beyond max_entries.
+    """
+    
+    BANDS = 8
+    
+    def __init__(self, path=DEDUP_INDEX_PATH, window_hours=DEDUP_WINDOW_HOURS, max_entries=DEDUP_MAX_ENTRIES):
+        self.path = path
+        self.window = window_hours * 3600
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.bands = {}
+        self.stats = {"checks": 0, "exact": 0, "near": 0, "lookup_seconds": 0.0}
+        self.load()
+    
+    def _band_keys(self, scope, fingerprint):
+        width = 64 // self.BANDS
+        return [(scope, band, fingerprint >> (band * width) & ((1 << width) - 1)) for band in range(self.BANDS)]
+    
+    def _add(self, entry_id, scope, fingerprint, seen_at):
+        self.entries[entry_id] = (scope, fingerprint, seen_at)
+        self.entries.move_to_end(entry_id)
+        for band_key in self._band_keys(scope, fingerprint):
+            self.bands.setdefault(band_key, set()).add(entry_id)
+    
+    def _remove(self, entry_id):
+        scope, fingerprint, _ = self.entries.pop(entry_id)
+        for band_key in self._band_keys(scope, fingerprint):
+            members = self.bands.get(band_key)
+            if members:
+                members.discard(entry_id)
+                if not members:
+                    del self.bands[band_key]
+    
+    def _evict(self, now):
+        # Oldest entries sit at the front of the OrderedDict
+        while self.entries:
+            entry_id, (_, _, seen_at) = next(iter(self.entries.items()))
+            if len(self.entries) <= self.max_entries and now - seen_at <= self.window:
+                break
+            self._remove(entry_id)
+    
+    def check_and_add(self, contact_info, message):
+        """Return None for a new complaint (and index it), or 'exact'/'near' for a duplicate"""
+        start = time.perf_counter()
+        now = time.time()
+        scope = f"{normalize_name(contact_info.get('name'))}|{contact_info.get('phone', '')}"
+        text = normalize_complaint_text(message)
+        entry_id = scope + "|" + hashlib.sha1(text.encode("utf-8")).hexdigest()
+        fingerprint = simhash(text)
         
-        print("✅ Done!")
+        duplicate = None
+        if entry_id in self.entries:
+            duplicate = "exact"
+        else:
+            for band_key in self._band_keys(scope, fingerprint):
+                for other_id in self.bands.get(band_key, ()):
+                    if bin(self.entries[other_id][1] ^ fingerprint).count("1") <= DEDUP_SIMHASH_DISTANCE:
+                        duplicate = "near"
+                        break
+                if duplicate:
+                    break
         
-        # Optional: keep browser open
-        input("Press Enter to close browser...")
+        if not duplicate:
+            self._add(entry_id, scope, fingerprint, now)
+        elif duplicate == "exact":
+            # Refresh so repeated resends stay in the window
+            self._add(entry_id, scope, fingerprint, now)
+        self._evict(now)
+        
+        self.stats["checks"] += 1
+        if duplicate:
+            self.stats[duplicate] += 1
+        self.stats["lookup_seconds"] += time.perf_counter() - start
+        return duplicate
+    
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for entry_id, scope, fingerprint, seen_at in snapshot.get("entries", []):
+            if now - seen_at <= self.window:
+                self._add(entry_id, scope, int(fingerprint, 16), seen_at)
+        self._evict(now)
+    
+    def save(self):
+        self._evict(time.time())
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"entries": [
+                    [entry_id, scope, f"{fingerprint:016x}", seen_at]
+                    for entry_id, (scope, fingerprint, seen_at) in self.entries.items()
+                ]}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not save dedup index: {e}")
+    
+    def print_stats(self):
+        checks = self.stats["checks"]
+        avg_us = self.stats["lookup_seconds"] / checks * 1e6 if checks else 0
+        print(f"🧬 Dedup: {checks} checked | {self.stats['exact']} exact | {self.stats['near']} near duplicates | "
+              f"{len(self.entries)} indexed | {avg_us:.0f}µs per lookup")
+
+_deduplicator = None
+
+def get_deduplicator():
+    """Shared dedup index, loaded on first use"""
+    global _deduplicator
+    if _deduplicator is None:
+        _deduplicator = ComplaintDeduplicator(DEDUP_INDEX_PATH)
+    return _deduplicator
+
+def close_deduplicator():
+    """Snapshot the dedup index to disk"""
+    global _deduplicator
+    if _deduplicator is not None:
+        _deduplicator.print_stats()
+        _deduplicator.save()
+        _deduplicator = None
+
+# Pakistani mobile numbers: 03XXXXXXXXX, +92 3XX XXXXXXX, 0092-3XX-XXXXXXX ...
+PHONE_PATTERN = re.compile(
+    r"(?:(?:my\s+)?(?:phone|mobile|cell|contact|whatsapp)?\s*(?:no\.?|number|num|#)\s*(?:is|:|-)?\s*)?"
+    r"(?<!\d)((?:(?:\+|00)?92[\s-]?|0)3\d{2}[\s-]?\d{7})(?!\d)",
+    re.IGNORECASE,
+)
+NAME_WORD = r"[A-Za-z][A-Za-z.'-]*"
+CAPITALISED_NAME_WORD = r"[A-Z][A-Za-z.'-]*"
+# (pattern, confidence penalty): "my name is" is reliable, "I am ..." is not
+NAME_PATTERNS = [
+    (re.compile(rf"\b(?:my\s+name\s+is|my\s+name's|name\s*[:\-])\s*({NAME_WORD}(?:\s+{NAME_WORD}){{0,2}})", re.IGNORECASE), 0.0),
+    (re.compile(rf"\b(?:mera\s+naa?m)\s+({NAME_WORD}(?:\s+{NAME_WORD}){{0,2}}?)\s+(?:hai|he|hy|h)\b", re.IGNORECASE), 0.0),
+    # Case-sensitive name: "I am Ali" is an introduction, "I am unable to..." is not
+    (re.compile(rf"\b(?i:this\s+is|i\s+am|i'm|im)\s+({CAPITALISED_NAME_WORD}(?:\s+{CAPITALISED_NAME_WORD}){{0,2}})"), 0.2),
+]
+# Words that end a captured name ("I am Ali from Lahore" -> "Ali")
+NAME_STOPWORDS = {
+    "and", "from", "my", "i", "is", "here", "the", "a", "an", "to", "in", "at", "of", "with",
+    "not", "very", "facing", "having", "writing", "calling", "complaining", "reporting", "living",
+    "want", "would", "need", "please", "phone", "number", "mobile", "contact", "resident", "sir",
+    # Words that follow "this is" / "I am" in a complaint rather than a name
+    "unable", "urgent", "really", "so", "still", "again", "also", "your", "regarding", "about",
+    "sorry", "tired", "worried", "concerned", "frustrated", "disappointed", "fed", "going",
+    "getting", "trying", "waiting", "requesting", "informing", "asking", "telling", "sending",
+    "being", "now", "just", "extremely", "totally", "another", "second", "third", "last",
+    "final", "serious", "important", "emergency", "ridiculous", "unacceptable", "it", "that",
+    "we", "our", "there", "no", "outside", "inside", "near", "on", "for",
+}
+GREETING_PATTERN = re.compile(
+    r"^\s*(?:hi|hello|hey|dear\s+sir|sir|salam|salaam|aoa|assalam[ -]?o[ -]?alaikum|asalam[ -]?o[ -]?alaikum)\b[\s,!.]*",
+    re.IGNORECASE,
+)
+
+def normalize_phone_number(raw):
+    """Turn any accepted spelling of a Pakistani mobile number into 03XXXXXXXXX"""
+    digits = re.sub(r"\D", "", raw)
+    if digits.startswith("0092"):
+        digits = "0" + digits[4:]
+    elif digits.startswith("92"):
+        digits = "0" + digits[2:]
+    return digits if re.fullmatch(r"03\d{9}", digits) else None
+
+def extract_name(text):
+    """Return (name, penalty, span) for the first name pattern that matches"""
+    for pattern, penalty in NAME_PATTERNS:
+        match = pattern.search(text)
+        if not match:
+            continue
+        words = []
+        end = match.start(1)
+        for word in re.finditer(r"\S+", match.group(1)):
+            if word.group().lower().strip(".'-") in NAME_STOPWORDS:
+                break
+            words.append(word.group().strip(".'-"))
+            end = match.start(1) + word.end()
+            if word.group().endswith("."):
+                # End of sentence ends the name too
+                break
+        else:
+            # The whole capture is the name: drop the clause's tail too ("... hai")
+            end = match.end()
+        if words:
+            return " ".join(word.capitalize() for word in words), penalty, (match.start(), end)
+    return None, 0.0, None
+
+def extract_complaint_fields_local(message):
+    """Pull name, phone number and problem out of a message with compiled patterns
+
+    Returns {"name", "phone_number", "problem", "confidence", "source"}; the
+    confidence drops when the message looks like it contains a name or a
+    number that the patterns could not read.
+    """
+    text = " ".join((message or "").split())
+    name, name_penalty, name_span = extract_name(text)
+    
+    phone_number = None
+    phone_spans = []
+    for match in PHONE_PATTERN.finditer(text):
+        phone_spans.append(match.span())
+        phone_number = phone_number or normalize_phone_number(match.group(1))
+    
+    # Problem = the message with only the name/number clauses taken out
+    spans = sorted(([name_span] if name_span else []) + phone_spans)
+    remainder = ""
+    position = 0
+    for start, end in spans:
+        remainder += text[position:max(start, position)] + " "
+        position = max(position, end)
+    remainder += text[position:]
+    remainder = " ".join(re.sub(r"\s*([,;])(?:\s*[,;])+", r"\1", remainder).split())
+    sentences = []
+    for sentence in re.split(r"(?<=[.!?])\s+|\n+", remainder):
+        sentence = GREETING_PATTERN.sub("", sentence)
+        sentence = re.sub(r"^[\s,;:.!-]*(?:and|also)?[\s,;:-]*|[\s,;:-]+$", "", sentence, flags=re.IGNORECASE)
+        if sentence:
+            sentences.append(sentence)
+    problem = " ".join(sentences)
+    
+    confidence = 1.0 - name_penalty
+    if not name and re.search(r"\b(?:name|naam|nam)\b", text, re.IGNORECASE):
+        confidence -= 0.4
+    if not phone_number and re.search(r"\d[\d\s-]{6,}\d", text):
+        confidence -= 0.4
+    if len(problem.split()) < 3:
+        confidence -= 0.5
+    
+    return {
+        "name": name or "",
+        "phone_number": phone_number or "",
+        "problem": problem or text,
+        "confidence": round(max(confidence, 0.0), 2),
+        "source": "local",
+    }
+
+def build_llm_prompt(messages):
+    """The n8n 'AI Agent' instructions, for a numbered batch of messages"""
+    batch = [{"id": i, "text": message} for i, message in enumerate(messages)]
+    return (
+        "Parse each customer message below for these fields: name, phone_number, problem.\n"
+        "Return only a JSON array with one object per message, in the same order:\n"
+        '[{"id": 0, "name": "", "phone_number": "", "problem": ""}]\n'
+        "Output only the JSON, nothing else. If anything is missing, return it as an empty "
+        "string \"\", but always include all keys.\n\n"
+        f"MESSAGES:\n{json.dumps(batch, ensure_ascii=False)}"
+    )
+
+def parse_llm_fields(output, ids):
+    """Strictly validate a model reply: one complete record per requested id
+
+    Accepts the JSON wrapped in prose or code fences, but raises ValueError
+    on anything missing, extra, mistyped or out of order.
+    """
+    starts = [i for i in (output.find("["), output.find("{")) if i >= 0]
+    if not starts:
+        raise ValueError("no JSON in model output")
+    parsed, _ = json.JSONDecoder().raw_decode(output[min(starts):])
+    if isinstance(parsed, dict):
+        parsed = [parsed]
+    if not isinstance(parsed, list) or len(parsed) != len(ids):
+        raise ValueError(f"expected {len(ids)} records, got {len(parsed) if isinstance(parsed, list) else parsed!r}")
+    
+    results = {}
+    for position, item in enumerate(parsed):
+        if not isinstance(item, dict):
+            raise ValueError(f"record {position} is not an object")
+        missing = {"name", "phone_number", "problem"} - item.keys()
+        if missing:
+            raise ValueError(f"record {position} is missing {sorted(missing)}")
+        record_id = item.get("id", ids[position])
+        if isinstance(record_id, str) and record_id.isdigit():
+            record_id = int(record_id)
+        if record_id not in ids or record_id in results:
+            raise ValueError(f"record {position} has unexpected id {record_id!r}")
+        
+        values = {}
+        for key in ("name", "phone_number", "problem"):
+            value = "" if item[key] is None else item[key]
+            if not isinstance(value, str):
+                raise ValueError(f"record {position}: {key} is not a string")
+            values[key] = value.strip()
+        results[record_id] = {
+            "name": values["name"],
+            "phone_number": normalize_phone_number(values["phone_number"]) or "",
+            "problem": values["problem"],
+            "confidence": 1.0,
+            "source": "llm",
+        }
+    return [results[record_id] for record_id in ids]
+
+def openrouter_model(prompt):
+    """Send one prompt to the OpenRouter chat model and return its text reply"""
+    response = get_form_session().post(
+        LLM_API_URL,
+        headers={"Authorization": f"Bearer {LLM_API_KEY}"},
+        json={"model": LLM_MODEL, "messages": [{"role": "user", "content": prompt}]},
+        timeout=LLM_TIMEOUT,
+    )
+    response.raise_for_status()
+    return response.json()["choices"][0]["message"]["content"]
+
+class MockLLMModel:
+    """Deterministic stand-in for the LLM: answers batch prompts with the local extractor after a fixed delay"""
+    
+    def __init__(self, latency=0.2, per_item_latency=0.02):
+        self.latency = latency
+        self.per_item_latency = per_item_latency
+        self.calls = 0
+        self.lock = threading.Lock()
+    
+    def __call__(self, prompt):
+        messages = json.loads(prompt[prompt.rindex("MESSAGES:") + len("MESSAGES:"):])
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.latency + self.per_item_latency * len(messages))
+        
+        records = []
+        for message in messages:
+            fields = extract_complaint_fields_local(message["text"])
+            records.append({"id": message["id"], "name": fields["name"],
+                            "phone_number": fields["phone_number"], "problem": fields["problem"]})
+        # Real models like to wrap their JSON in code fences
+        return "```json\n" + json.dumps(records, ensure_ascii=False) + "\n```"
+
+class LLMExtractionStage:
+    """Cached, micro-batched complaint field extraction through an LLM
+
+    extract() blocks until the result is ready. Identical messages (after
+    normalization) are answered from an LRU/TTL cache or share the request
+    already in flight; new ones are packed into one prompt per batch.
+    """
+    
+    def __init__(self, model, batch_size=LLM_BATCH_SIZE, batch_wait=LLM_BATCH_WAIT_SECONDS,
+                 cache_size=LLM_CACHE_SIZE, cache_ttl=LLM_CACHE_TTL_SECONDS,
+                 max_concurrent_calls=LLM_MAX_CONCURRENT_CALLS, memoize=True):
+        self.model = model
+        self.memoize = memoize
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.cache = OrderedDict()
+        self.pending = OrderedDict()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.latencies = deque(maxlen=10000)
+        self.stats = {"requests": 0, "cache_hits": 0, "coalesced": 0, "model_calls": 0, "failures": 0}
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent_calls, thread_name_prefix="llm-call")
+        self.worker = threading.Thread(target=self._collect_batches, daemon=True)
+        self.worker.start()
+    
+    def submit(self, message):
+        """Future of the fields for one message (None if the model failed); never blocks.
+        The result may be shared with other callers, so copy it before changing it"""
+        start = time.perf_counter()
+        key = hashlib.sha1(normalize_complaint_text(message).encode("utf-8")).hexdigest()
+        if not self.memoize:
+            key = (key, object())
+        with self.condition:
+            self.stats["requests"] += 1
+            cached = self.cache.get(key)
+            if cached and cached[1] > time.time():
+                self.cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                future = Future()
+                future.set_result(cached[0])
+            elif key in self.pending:
+                self.stats["coalesced"] += 1
+                future = self.pending[key][1]
+            else:
+                future = Future()
+                self.pending[key] = (message, future)
+                self.condition.notify()
+        
+        def record_latency(_):
+            with self.condition:
+                self.latencies.append(time.perf_counter() - start)
+        future.add_done_callback(record_latency)
+        return future
+    
+    def extract(self, message, timeout=None):
+        """Fields for one message (None if the model failed)"""
+        result = self.submit(message).result(timeout)
+        return dict(result) if result else None
+    
+    def _collect_batches(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if self.closed and not self.pending:
+                    return
+                # Give a burst a moment to fill the batch
+                deadline = time.time() + self.batch_wait
+                while len(self.pending) < self.batch_size and not self.closed:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                batch = [self.pending.popitem(last=False) for _ in range(min(self.batch_size, len(self.pending)))]
+            self.executor.submit(self._process, batch)
+    
+    def _call_model(self, messages):
+        with self.condition:
+            self.stats["model_calls"] += 1
+        return parse_llm_fields(self.model(build_llm_prompt(messages)), list(range(len(messages))))
+    
+    def _process(self, batch):
+        messages = [message for _, (message, _) in batch]
+        try:
+            results = self._call_model(messages)
+        except Exception as e:
+            print(f"⚠️ LLM batch of {len(batch)} failed ({e}), retrying one by one")
+            results = []
+            for message in messages:
+                try:
+                    results.append(self._call_model([message])[0] if len(messages) > 1 else None)
+                except Exception as e:
+                    print(f"⚠️ LLM extraction failed: {e}")
+                    results.append(None)
+        
+        with self.condition:
+            for (key, _), result in zip(batch, results):
+                if result is None:
+                    self.stats["failures"] += 1
+                    continue
+                self.cache[key] = (result, time.time() + self.cache_ttl)
+                self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        for (_, (_, future)), result in zip(batch, results):
+            future.set_result(result)
+    
+    def latency_percentile(self, percentile):
+        with self.condition:
+            latencies = sorted(self.latencies)
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percentile / 100))]
+    
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.worker.join()
+        self.executor.shutdown(wait=True)
+    
+    def print_stats(self):
+        requests_made = self.stats["requests"]
+        saved = requests_made - self.stats["model_calls"]
+        print(f"🤖 LLM stage: {requests_made} requests | {self.stats['model_calls']} model calls "
+              f"({saved} saved) | {self.stats['cache_hits']} cache hits | {self.stats['coalesced']} coalesced | "
+              f"{self.stats['failures']} failures | p50 {self.latency_percentile(50):.2f}s | "
+              f"p95 {self.latency_percentile(95):.2f}s")
+
+_llm_stage = None
+
+def get_llm_stage():
+    """Shared LLM stage, or None when no model is configured"""
+    global _llm_stage
+    if _llm_stage is None:
+        if LLM_MOCK:
+            _llm_stage = LLMExtractionStage(MockLLMModel())
+        elif LLM_API_KEY:
+            _llm_stage = LLMExtractionStage(openrouter_model)
+    return _llm_stage
+
+def close_llm_stage():
+    """Finish in-flight LLM batches and print stage metrics"""
+    global _llm_stage
+    if _llm_stage is not None:
+        _llm_stage.close()
+        _llm_stage.print_stats()
+        _llm_stage = None
+
+@timed("llm_extract", ok=lambda fields: fields is not None)
+def llm_extract_fields(message):
+    """Extract complaint fields through the LLM stage; None if unavailable"""
+    stage = get_llm_stage()
+    if stage is None:
+        return None
+    
+    try:
+        return stage.extract(message, timeout=LLM_TIMEOUT * 2)
+    except Exception as e:
+        print(f"⚠️ LLM extraction failed: {e}")
+        return None
+
+def benchmark_llm_stage(count=200, unique=50, concurrency=32):
+    """Burst-load the LLM stage with the mock model: model calls saved and latency"""
+    messages = [
+        f"{EXTRACTOR_SAMPLES[i % unique % len(EXTRACTOR_SAMPLES)]} (ref {i % unique})"
+        for i in range(count)
+    ]
+    random.Random(42).shuffle(messages)
+    
+    print("\n" + "="*50)
+    print(f"📊 LLM STAGE BENCHMARK ({count} messages, {unique} distinct, {concurrency} concurrent)")
+    print("="*50)
+    for label, options in (
+        ("No cache, no batching", {"batch_size": 1, "memoize": False}),
+        ("Cache + micro-batching", {}),
+    ):
+        model = MockLLMModel()
+        stage = LLMExtractionStage(model, **options)
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(stage.extract, messages))
+        elapsed = time.time() - start
+        stage.close()
+        print(f"{label}: {model.calls} model calls for {count} messages in {elapsed:.2f}s")
+        stage.print_stats()
+    print("="*50)
+
+def extract_complaint_fields(message):
+    """Local extraction first; the LLM only sees messages the patterns are unsure about"""
+    fields = extract_complaint_fields_local(message)
+    if fields["confidence"] >= LOCAL_EXTRACT_MIN_CONFIDENCE:
+        return fields
+    
+    return merge_llm_fields(fields, llm_extract_fields(message))
+
+def merge_llm_fields(fields, llm_fields):
+    """Local fields completed by the model's answer (if any)"""
+    if not llm_fields:
+        return fields
+    # Keep whatever the patterns found when the model leaves a field empty; the
+    # problem stays the customer's own words rather than the model's summary
+    merged = {key: llm_fields.get(key) or fields.get(key) for key in fields}
+    merged["problem"] = fields["problem"]
+    return merged
+
+def enrich_contact_info(contact_info, message, fields):
+    """Fill the form's name/phone/problem from extracted fields, keeping WhatsApp data as fallback"""
+    print(f"🧾 Fields ({fields['source']}, confidence {fields['confidence']}): "
+          f"name={fields['name'] or '-'} phone={fields['phone_number'] or '-'}")
+    
+    enriched = dict(contact_info)
+    if fields["name"]:
+        enriched["name"] = fields["name"]
+    if fields["phone_number"] and contact_info.get("phone") in (None, "", "Unknown"):
+        enriched["phone"] = fields["phone_number"]
+    return enriched, fields["problem"] or message
+
+# Messages in the shapes customers actually send, for --bench-extractor
+EXTRACTOR_SAMPLES = [
+    "Hi, my name is Zain. My phone number is 03011234567. I want to report a broken street light in Lahore.",
+    "AOA my name is Ayesha Khan, my number is 0321-7654321. There is no water supply in G-9/2 since two days.",
+    "Assalam o alaikum, mera naam Bilal hai. 0300 1234567. Gas pressure is very low in our street in Johar Town.",
+    "Salam this is Usman from Rawalpindi, contact no: +92 333 4455667, garbage has not been collected for a week",
+    "Sir the sewerage line is blocked near house 45 block C and water is overflowing on the road",
+    "My name is Hina. Electricity has been out since morning in Gulberg 3, please send someone. 0345-1122334",
+    "please help road is broken",
+    "I am Ahmed Raza, number 923001112223, the street light outside my house keeps flickering at night",
+]
+
+def benchmark_extractor(iterations=20000, llm_samples=3):
+    """Compare local extraction throughput/latency with the LLM path"""
+    print("\n" + "="*50)
+    print("📊 COMPLAINT EXTRACTOR BENCHMARK")
+    print("="*50)
+    
+    for sample in EXTRACTOR_SAMPLES:
+        fields = extract_complaint_fields_local(sample)
+        route = "local" if fields["confidence"] >= LOCAL_EXTRACT_MIN_CONFIDENCE else "LLM fallback"
+        print(f"[{fields['confidence']:.2f} {route}] name={fields['name']!r} phone={fields['phone_number']!r}")
+        print(f"   problem={fields['problem'][:80]!r}")
+    
+    latencies = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        sample_start = time.perf_counter()
+        extract_complaint_fields_local(EXTRACTOR_SAMPLES[i % len(EXTRACTOR_SAMPLES)])
+        latencies.append(time.perf_counter() - sample_start)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print("-"*50)
+    print(f"Local: {iterations / elapsed:,.0f} msg/s | p50 {latencies[len(latencies) // 2] * 1e6:.0f}µs | "
+          f"p95 {latencies[int(len(latencies) * 0.95)] * 1e6:.0f}µs")
+    
+    if not LLM_API_KEY:
+        print("LLM: skipped (set OPENROUTER_API_KEY to time the model path)")
+    else:
+        llm_latencies = []
+        for sample in EXTRACTOR_SAMPLES[:llm_samples]:
+            sample_start = time.perf_counter()
+            llm_extract_fields(sample)
+            llm_latencies.append(time.perf_counter() - sample_start)
+        llm_latencies.sort()
+        print(f"LLM ({LLM_MODEL}): {len(llm_latencies) / sum(llm_latencies):.2f} msg/s | "
+              f"p50 {llm_latencies[len(llm_latencies) // 2]:.2f}s | max {llm_latencies[-1]:.2f}s")
+    
+    fallbacks = sum(1 for sample in EXTRACTOR_SAMPLES
+                    if extract_complaint_fields_local(sample)["confidence"] < LOCAL_EXTRACT_MIN_CONFIDENCE)
+    print(f"LLM fallback rate on samples: {fallbacks}/{len(EXTRACTOR_SAMPLES)}")
+    print("="*50)
+
+COMPLAINT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS complaints (
+    id INTEGER PRIMARY KEY,
+    key TEXT UNIQUE,
+    contact TEXT NOT NULL,
+    name TEXT,
+    phone TEXT,
+    problem TEXT NOT NULL,
+    message TEXT,
+    created_at REAL NOT NULL,
+    submitted INTEGER
+);
+CREATE INDEX IF NOT EXISTS complaints_contact ON complaints(contact, created_at);
+CREATE INDEX IF NOT EXISTS complaints_phone ON complaints(phone, created_at);
+CREATE INDEX IF NOT EXISTS complaints_created ON complaints(created_at);
+"""
+# External-content FTS5 index over complaints.problem, kept in sync by triggers;
+# the porter stemmer lets "street lights" match "Street light broken"
+COMPLAINT_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS complaints_fts USING fts5(problem, content='complaints', content_rowid='id',
+                                                             tokenize='porter unicode61');
+CREATE TRIGGER IF NOT EXISTS complaints_fts_insert AFTER INSERT ON complaints BEGIN
+    INSERT INTO complaints_fts(rowid, problem) VALUES (new.id, new.problem);
+END;
+CREATE TRIGGER IF NOT EXISTS complaints_fts_delete AFTER DELETE ON complaints BEGIN
+    INSERT INTO complaints_fts(complaints_fts, rowid, problem) VALUES ('delete', old.id, old.problem);
+END;
+CREATE TRIGGER IF NOT EXISTS complaints_fts_update AFTER UPDATE OF problem ON complaints BEGIN
+    INSERT INTO complaints_fts(complaints_fts, rowid, problem) VALUES ('delete', old.id, old.problem);
+    INSERT INTO complaints_fts(rowid, problem) VALUES (new.id, new.problem);
+END;
+"""
+
+def open_complaint_db(path=None):
+    """Connect to the complaint database (WAL mode), creating the schema if needed;
+    returns (connection, whether full-text search is available)"""
+    connection = sqlite3.connect(path or COMPLAINT_DB_PATH, timeout=30, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(COMPLAINT_SCHEMA)
+    try:
+        row = connection.execute("SELECT sql FROM sqlite_master WHERE name = 'complaints_fts'").fetchone()
+        # An index from before stemming is rebuilt from the complaints table
+        unstemmed = row is not None and "porter" not in row[0]
+        if unstemmed:
+            connection.execute("DROP TABLE complaints_fts")
+        connection.executescript(COMPLAINT_FTS_SCHEMA)
+        if unstemmed:
+            with connection:
+                connection.execute("INSERT INTO complaints_fts(complaints_fts) VALUES ('rebuild')")
+        return connection, True
+    except sqlite3.OperationalError as e:
+        # SQLite built without FTS5: searches fall back to LIKE
+        print(f"⚠️ Full-text search unavailable ({e}), using LIKE")
+        return connection, False
+
+class ComplaintStore:
+    """SQLite history of every queued complaint. Writes are queued and
+    committed in batches by one background thread."""
+    
+    def __init__(self, path=COMPLAINT_DB_PATH, batch_size=COMPLAINT_DB_BATCH_SIZE,
+                 flush_seconds=COMPLAINT_DB_FLUSH_SECONDS):
+        self.connection, self.fts = open_complaint_db(path)
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.queue = queue.Queue()
+        self.stats = {"inserted": 0, "updated": 0, "batches": 0}
+        self.thread = threading.Thread(target=self._run, name="complaint-store", daemon=True)
+        self.thread.start()
+    
+    def add(self, key, contact, name, phone, problem, message):
+        self.queue.put(("insert", (key, contact, name, phone, problem, message, time.time())))
+    
+    def mark_submitted(self, key, ok):
+        self.queue.put(("update", (1 if ok else 0, key)))
+    
+    def update_fields(self, key, name, phone, problem):
+        self.queue.put(("fields", (name, phone, problem, key)))
+    
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.time() + self.flush_seconds
+            while len(batch) < self.batch_size and batch[-1][0] is not None:
+                try:
+                    batch.append(self.queue.get(timeout=max(0, deadline - time.time())))
+                except queue.Empty:
+                    break
+            self._write(batch)
+            if batch[-1][0] is None:
+                return
+    
+    def _write(self, batch):
+        inserts = [params for op, params in batch if op == "insert"]
+        fields = [params for op, params in batch if op == "fields"]
+        updates = [params for op, params in batch if op == "update"]
+        if not inserts and not fields and not updates:
+            return
+        try:
+            with self.connection:
+                # Inserts first so an update for a complaint in the same batch finds its row
+                self.connection.executemany(
+                    "INSERT OR IGNORE INTO complaints (key, contact, name, phone, problem, message, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", inserts)
+                self.connection.executemany("UPDATE complaints SET name = ?, phone = ?, problem = ? WHERE key = ?", fields)
+                self.connection.executemany("UPDATE complaints SET submitted = ? WHERE key = ?", updates)
+            self.stats["inserted"] += len(inserts)
+            self.stats["updated"] += len(fields) + len(updates)
+            self.stats["batches"] += 1
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not write {len(batch)} complaint record(s): {e}")
+    
+    def close(self):
+        self.queue.put((None, None))
+        self.thread.join()
+        self.connection.close()
+
+_complaint_store = None
+
+def get_complaint_store():
+    """Shared complaint store, opened on first use"""
+    global _complaint_store
+    if _complaint_store is None:
+        _complaint_store = ComplaintStore(COMPLAINT_DB_PATH)
+    return _complaint_store
+
+def close_complaint_store():
+    """Commit queued writes and close the database"""
+    global _complaint_store
+    if _complaint_store is not None:
+        _complaint_store.close()
+        _complaint_store = None
+
+def recent_complainants(days=SCHEDULER_COMPLAINANT_DAYS):
+    """Normalized chat names that sent a complaint in the last days"""
+    if not os.path.exists(COMPLAINT_DB_PATH):
+        return set()
+    try:
+        # A separate connection, so this read doesn't wait on the store's writer thread
+        connection = sqlite3.connect(COMPLAINT_DB_PATH, timeout=5)
+        try:
+            rows = connection.execute("SELECT DISTINCT contact FROM complaints WHERE created_at >= ?",
+                                      (time.time() - days * 86400,)).fetchall()
+        finally:
+            connection.close()
+    except sqlite3.Error as e:
+        print(f"⚠️ Could not read known complainants: {e}")
+        return set()
+    return {normalize_name(contact) for (contact,) in rows}
+
+def parse_since(value):
+    """Unix time for "7d", "12h", "2w", "today" or a YYYY-MM-DD date"""
+    value = value.strip().lower()
+    if value == "today":
+        return time.mktime(time.strptime(time.strftime("%Y-%m-%d"), "%Y-%m-%d"))
+    match = re.fullmatch(r"(\d+)\s*([hdw])", value)
+    if match:
+        return time.time() - int(match.group(1)) * {"h": 3600, "d": 86400, "w": 7 * 86400}[match.group(2)]
+    try:
+        return time.mktime(time.strptime(value, "%Y-%m-%d"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid time {value!r} (use 12h, 7d, 2w, today or YYYY-MM-DD)")
+
+def query_complaints(connection, fts=True, search=None, phone=None, contact=None,
+                     since=None, until=None, group_by=None, limit=50):
+    """Complaint rows (newest first) or counts per day/contact/phone matching the filters"""
+    where = []
+    params = []
+    source = "complaints c"
+    if search:
+        if fts:
+            source = "complaints_fts f JOIN complaints c ON c.id = f.rowid"
+            # Each word quoted, so user input can't be FTS syntax; words are ANDed
+            where.append("complaints_fts MATCH ?")
+            params.append(" ".join('"' + word.replace('"', '""') + '"' for word in search.split()))
+        else:
+            for word in search.split():
+                where.append("c.problem LIKE ?")
+                params.append(f"%{word}%")
+    if phone:
+        where.append("c.phone = ?")
+        params.append(normalize_phone_number(phone) or phone)
+    if contact:
+        where.append("c.contact = ?")
+        params.append(contact)
+    if since is not None:
+        where.append("c.created_at >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("c.created_at < ?")
+        params.append(until)
+    where_sql = f" WHERE {' AND '.join(where)}" if where else ""
+    
+    if group_by:
+        column = {"day": "date(c.created_at, 'unixepoch', 'localtime')", "contact": "c.contact", "phone": "c.phone"}[group_by]
+        sql = f"SELECT {column} AS bucket, COUNT(*) AS complaints FROM {source}{where_sql} GROUP BY bucket ORDER BY {'bucket DESC' if group_by == 'day' else 'complaints DESC'} LIMIT ?"
+    else:
+        sql = (f"SELECT c.created_at, c.contact, c.name, c.phone, c.problem, c.submitted "
+               f"FROM {source}{where_sql} ORDER BY c.created_at DESC LIMIT ?")
+    return connection.execute(sql, params + [limit]).fetchall()
+
+def run_store_query(args):
+    """--query: print matching complaints from the local store"""
+    if not os.path.exists(COMPLAINT_DB_PATH):
+        print(f"❌ No complaint store at {COMPLAINT_DB_PATH} yet")
+        return
+    connection, fts = open_complaint_db(COMPLAINT_DB_PATH)
+    start = time.perf_counter()
+    rows = query_complaints(
+        connection, fts,
+        search=args.search,
+        phone=args.phone,
+        contact=args.contact,
+        since=args.since,
+        until=args.until,
+        group_by=args.group_by,
+        limit=args.limit,
+    )
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    connection.close()
+    
+    for row in rows:
+        if args.group_by:
+            print(f"{row[0] or '-':<24} {row[1]:>7}")
+        else:
+            created_at, contact, name, phone, problem, submitted = row
+            status = {1: "✅", 0: "❌"}.get(submitted, "⏳")
+            print(f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(created_at))} {status} "
+                  f"{contact[:20]:<20} {phone or '-':<14} {problem[:80]}")
+    print(f"🔎 {len(rows)} row(s) in {elapsed_ms:.1f} ms")
+
+class ComplaintFeed:
+    """Numbered stream of queued complaints for local consumers. The last
+    max_records stay in memory and in an append-only log, so sequence
+    numbers and consumer cursors survive restarts."""
+    
+    def __init__(self, path=INGEST_FEED_PATH, cursors_path=INGEST_CURSORS_PATH, max_records=INGEST_FEED_MAX_RECORDS):
+        self.path = path
+        self.cursors_path = cursors_path
+        self.max_records = max_records
+        self.condition = threading.Condition()
+        self.records = deque(maxlen=max_records)
+        self.seq = 0
+        self.log_lines = 0
+        self.closed = False
+        
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+                    self.records.append(record)
+                    self.seq = max(self.seq, record["seq"])
+                    self.log_lines += 1
+        except OSError:
+            pass
+        try:
+            with open(cursors_path, "r", encoding="utf-8") as f:
+                self.cursors = json.load(f)
+        except (OSError, ValueError):
+            self.cursors = {}
+        self.file = open(path, "a", encoding="utf-8", buffering=1)
+    
+    def publish(self, record):
+        """Append a record and wake up waiting readers; returns its sequence number"""
+        with self.condition:
+            self.seq += 1
+            record = dict(record, seq=self.seq)
+            self.records.append(record)
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.log_lines += 1
+            if self.log_lines > 2 * self.max_records:
+                self._compact()
+            self.condition.notify_all()
+            return self.seq
+    
+    def _compact(self):
+        # Rewrite the log with just what is still in memory
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in self.records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.close()
+        os.replace(tmp_path, self.path)
+        self.file = open(self.path, "a", encoding="utf-8", buffering=1)
+        self.log_lines = len(self.records)
+    
+    def read(self, cursor, limit):
+        """Up to limit records after cursor; gap is True when older records
+        after cursor already fell out of the buffer"""
+        with self.condition:
+            oldest = self.records[0]["seq"] if self.records else self.seq + 1
+            start = max(0, cursor + 1 - oldest)
+            batch = [self.records[i] for i in range(start, min(start + limit, len(self.records)))]
+            return batch, cursor + 1 < oldest and cursor < self.seq
+    
+    def wait(self, cursor, timeout):
+        """Block until there is a record after cursor (True) or timeout/close (False)"""
+        with self.condition:
+            return self.condition.wait_for(lambda: self.seq > cursor or self.closed, timeout) and self.seq > cursor
+    
+    def cursor_for(self, consumer):
+        with self.condition:
+            return self.cursors.get(consumer, 0)
+    
+    def commit(self, consumer, cursor):
+        """Remember that consumer has processed everything up to cursor"""
+        with self.condition:
+            self.cursors[consumer] = max(self.cursors.get(consumer, 0), min(cursor, self.seq))
+            tmp_path = self.cursors_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.cursors, f)
+            os.replace(tmp_path, self.cursors_path)
+            return self.cursors[consumer]
+    
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+            self.file.close()
+
+class IngestHandler(BaseHTTPRequestHandler):
+    """Local API over the server's ComplaintFeed:
+    
+    GET  /complaints?cursor=N&limit=M&wait=S  batch of records after cursor
+    GET  /complaints?consumer=NAME            ... after NAME's committed cursor
+    POST /complaints/ack?consumer=NAME&cursor=N  commit NAME's cursor
+    GET  /complaints/stream?cursor=N          NDJSON stream
+    GET  /complaints/events                   Server-Sent Events (honours Last-Event-ID)
+    GET  /health
+    """
+    
+    def send_json(self, data, status=200):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def query(self):
+        path, _, query = self.path.partition("?")
+        return path.rstrip("/") or "/", {key: values[0] for key, values in parse_qs(query).items()}
+    
+    def int_param(self, params, name, default, maximum=None):
+        try:
+            value = int(params.get(name, default))
+        except ValueError:
+            value = default
+        return min(value, maximum) if maximum is not None else value
+    
+    def do_GET(self):
+        feed = self.server.feed
+        path, params = self.query()
+        if path == "/health":
+            self.send_json({"ok": not feed.closed, "seq": feed.seq})
+        elif path == "/complaints":
+            consumer = params.get("consumer")
+            cursor = self.int_param(params, "cursor", feed.cursor_for(consumer) if consumer else 0)
+            limit = max(1, self.int_param(params, "limit", INGEST_BATCH_SIZE, INGEST_MAX_BATCH_SIZE))
+            wait = self.int_param(params, "wait", 0, INGEST_MAX_WAIT_SECONDS)
+            if wait and cursor >= feed.seq:
+                feed.wait(cursor, wait)
+            records, gap = feed.read(cursor, limit)
+            next_cursor = records[-1]["seq"] if records else cursor
+            self.send_json({"records": records, "next_cursor": next_cursor,
+                            "has_more": next_cursor < feed.seq, "gap": gap})
+        elif path in ("/complaints/stream", "/complaints/events"):
+            try:
+                default_cursor = int(self.headers.get("Last-Event-ID"))
+            except (TypeError, ValueError):
+                default_cursor = feed.seq
+            self.stream(path.endswith("events"), self.int_param(params, "cursor", default_cursor))
+        else:
+            self.send_json({"error": "not found"}, 404)
+    
+    def do_POST(self):
+        feed = self.server.feed
+        path, params = self.query()
+        if path != "/complaints/ack":
+            self.send_json({"error": "not found"}, 404)
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            try:
+                params.update(json.loads(self.rfile.read(length).decode("utf-8")))
+            except ValueError:
+                self.send_json({"error": "body must be JSON"}, 400)
+                return
+        if not params.get("consumer") or "cursor" not in params:
+            self.send_json({"error": "consumer and cursor are required"}, 400)
+            return
+        cursor = feed.commit(str(params["consumer"]), self.int_param(params, "cursor", 0))
+        self.send_json({"consumer": params["consumer"], "cursor": cursor})
+    
+    def stream(self, sse, cursor):
+        """Write records after cursor as they arrive; a slow client only
+        holds up its own thread, and its cursor means nothing is skipped"""
+        feed = self.server.feed
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream" if sse else "application/x-ndjson")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            while not feed.closed:
+                records, _ = feed.read(cursor, INGEST_MAX_BATCH_SIZE)
+                for record in records:
+                    data = json.dumps(record, ensure_ascii=False)
+                    self.wfile.write((f"id: {record['seq']}\nevent: complaint\ndata: {data}\n\n" if sse else data + "\n").encode("utf-8"))
+                    cursor = record["seq"]
+                if records:
+                    self.wfile.flush()
+                elif not feed.wait(cursor, INGEST_HEARTBEAT_SECONDS):
+                    # Heartbeat keeps proxies from closing an idle stream
+                    self.wfile.write(b": keepalive\n\n" if sse else b"\n")
+                    self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+    
+    def log_message(self, format, *args):
+        pass
+
+_ingest_feed = None
+_ingest_server = None
+
+def enable_ingest(port, host=INGEST_HOST):
+    """Publish queued complaints to a ComplaintFeed served on host:port"""
+    global _ingest_feed, _ingest_server
+    _ingest_feed = ComplaintFeed(INGEST_FEED_PATH, INGEST_CURSORS_PATH)
+    _ingest_server = ThreadingHTTPServer((host, port), IngestHandler)
+    _ingest_server.daemon_threads = True
+    _ingest_server.feed = _ingest_feed
+    threading.Thread(target=_ingest_server.serve_forever, daemon=True).start()
+    print(f"📡 Complaint feed on http://{host}:{_ingest_server.server_address[1]}/complaints "
+          f"(at sequence {_ingest_feed.seq})")
+    return _ingest_feed
+
+def close_ingest():
+    global _ingest_feed, _ingest_server
+    if _ingest_server is not None:
+        _ingest_feed.close()
+        _ingest_server.shutdown()
+        _ingest_server = None
+        _ingest_feed = None
+
+def publish_complaint(key, contact_info, message):
+    """Hand a queued complaint to feed consumers (same fields as chatData.json)"""
+    if _ingest_feed is None:
+        return None
+    return _ingest_feed.publish({
+        "key": key,
+        "contact_name": contact_info["name"],
+        "phone_number": contact_info["phone"],
+        "latest_message": message,
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+    })
+
+def store_phone(contact_info):
+    """The phone number as kept in the complaint store (None when unknown)"""
+    phone = contact_info["phone"] if contact_info["phone"] not in ("", "Unknown") else None
+    return phone and (normalize_phone_number(phone) or phone)
+
+def submission_callback(key):
+    """Record a submission's outcome in the outbox and the complaint store"""
+    def on_done(contact_info, message, ok):
+        get_complaint_store().mark_submitted(key, ok)
+        if ok:
+            get_outbox().mark_submitted(key)
+        else:
+            get_outbox().mark_failed(key, "form submission failed")
+    return on_done
+
+def submit_after_llm(key, contact_info, message, fields, stage):
+    """Let the LLM stage fill in fields, then update the logged complaint and submit it
+
+    Returns a Future of the submission result. Nothing blocks: the
+    submission is queued from the stage's thread when the batch answers.
+    """
+    result = Future()
+    start = time.perf_counter()
+    
+    def submit(llm_future):
+        try:
+            llm_fields = llm_future.result()
+        except Exception as e:
+            print(f"⚠️ LLM extraction failed: {e}")
+            llm_fields = None
+        if _metrics is not None:
+            _metrics.span("llm_extract", time.perf_counter() - start, llm_fields is not None)
+        try:
+            enriched, text = enrich_contact_info(contact_info, message, merge_llm_fields(fields, llm_fields))
+            get_outbox().update_extracted(key, enriched, text)
+            get_complaint_store().update_fields(key, enriched["name"], store_phone(enriched), text)
+            publish_complaint(key, enriched, text)
+            submission = get_form_submitter().submit(enriched, text, submission_callback(key))
+        except Exception as e:
+            result.set_exception(e)
+            return
+        submission.add_done_callback(
+            lambda f: result.set_exception(f.exception()) if f.exception() else result.set_result(f.result()))
+    
+    stage.submit(message).add_done_callback(submit)
+    return result
+
+def queue_complaint(contact_info, message):
+    """Log a complaint in the outbox and submit it in the background
+
+    Returns the submission Future, or None if this complaint is a duplicate
+    or was already submitted. Messages the local extractor is unsure about
+    are logged with their local fields first, keyed on the raw message, and
+    submitted once the LLM stage has filled them in; neither the scraping
+    thread nor the submitter's workers wait on the model.
+    """
+    if DEDUP_ENABLED:
+        duplicate = get_deduplicator().check_and_add(contact_info, message)
+        if duplicate:
+            print(f"ℹ️ {duplicate.capitalize()} duplicate of a recent complaint from {contact_info['name']} - skipping")
+            return None
+    
+    chat_name, original_message = contact_info["name"], message
+    fields = extract_complaint_fields_local(message)
+    stage = get_llm_stage() if fields["confidence"] < LOCAL_EXTRACT_MIN_CONFIDENCE else None
+    enriched, text = enrich_contact_info(contact_info, message, fields)
+    
+    outbox = get_outbox()
+    key = outbox.record_extracted(enriched, text, (contact_info, message) if stage is not None else None)
+    if key is None:
+        print("ℹ️ Complaint already submitted or being submitted - skipping")
+        return None
+    get_complaint_store().add(key, chat_name, enriched["name"], store_phone(enriched), text, original_message)
+    
+    if stage is not None:
+        return submit_after_llm(key, contact_info, message, fields, stage)
+    publish_complaint(key, enriched, text)
+    return get_form_submitter().submit(enriched, text, submission_callback(key))
+
+def replay_outbox():
+    """Resubmit complaints left pending by an earlier (crashed or offline) run"""
+    outbox = get_outbox()
+    outbox.compact()
+    pending = outbox.pending(claim=True)
+    if not pending:
+        return 0
+    
+    print(f"♻️ Outbox: replaying {len(pending)} pending complaint(s)")
+    for key, data in pending:
+        raw = data.get("llm_pending")
+        stage = get_llm_stage() if raw else None
+        if stage is not None:
+            # Logged before the LLM answered: ask again for the scraped message
+            fields = extract_complaint_fields_local(raw["message"])
+            submit_after_llm(key, raw["contact_info"], raw["message"], fields, stage)
+        else:
+            get_form_submitter().submit(data["contact_info"], data["message"], submission_callback(key))
+    return len(pending)
+
+def close_pipeline():
+    """Flush and stop the LLM stage, submitter, outbox and deduplicator"""
+    # LLM batches still in flight queue their submissions as they finish
+    close_llm_stage()
+    close_form_submitter()
+    close_outbox()
+    close_deduplicator()
+    close_complaint_store()
+    close_ingest()
+    close_metrics()
+    close_webdriver_profiler()
+    if _selector_resolver is not None:
+        _selector_resolver.save()
+    if _contact_cache is not None:
+        _contact_cache.save()
+
+class WatchState:
+    """Per-chat high-water marks and recently seen message ids"""
+    
+    def __init__(self, path=WATCH_STATE_PATH, max_seen=WATCH_SEEN_IDS):
+        self.path = path
+        self.max_seen = max_seen
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.chats = json.load(f)
+        except (OSError, ValueError):
+            self.chats = {}
+        # Chats with messages the handler failed on, to be read again on the next poll
+        self.retry = set()
+    
+    def save(self):
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.chats, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not save watch state: {e}")
+    
+    def high_water_mark(self, chat_key):
+        return self.chats.get(chat_key, {}).get("hwm")
+    
+    def is_new(self, chat_key, message_id):
+        return message_id not in self.chats.get(chat_key, {}).get("seen", [])
+    
+    def mark(self, chat_key, message_id):
+        chat = self.chats.setdefault(chat_key, {"hwm": None, "seen": []})
+        chat["hwm"] = message_id
+        chat["seen"].append(message_id)
+        del chat["seen"][:-self.max_seen]
+
+def extract_message_records(driver):
+    """All rendered messages of the open chat as records, in one scripted pass"""
+    return driver.execute_script(EXTRACT_MESSAGES_JS) or []
+
+def submit_message_records(contact_info, records):
+    """Default watch handler: save and submit a batch of new messages as one complaint"""
+    message = combine_complaint_text(records)
+    save_data_to_files(contact_info, message)
+    queue_complaint(contact_info, message)
+
+def ingest_message_records(chat_key, contact_info, records, state, handler):
+    """Pass records not seen before to handler exactly once and advance the high-water mark
+
+    Records are only marked as seen once handler returns; if it raises they
+    stay unseen and the chat is flagged in state.retry, so the next poll
+    catches up on every rendered message again.
+    """
+    unseen = [record for record in records if record.get("id") and state.is_new(chat_key, record["id"])]
+    new_records = [record for record in unseen if record.get("incoming") and record.get("text")]
+    
+    if new_records:
+        print(f"📥 {len(new_records)} new message(s) from {contact_info['name']}")
+        try:
+            handler(contact_info, new_records)
+        except Exception as e:
+            print(f"⚠️ Could not handle new messages from {contact_info['name']} (will retry): {e}")
+            state.retry.add(chat_key)
+            return 0
+    for record in unseen:
+        state.mark(chat_key, record["id"])
+    if unseen and records[-1].get("id"):
+        # A retried older message must not move the mark back
+        state.chats[chat_key]["hwm"] = records[-1]["id"]
+    state.save()
+    return len(new_records)
+
+def catch_up_chat(chat_key, contact_info, state, records, handler):
+    """Ingest messages that arrived since the last run (or failed earlier)"""
+    state.retry.discard(chat_key)
+    hwm = state.high_water_mark(chat_key)
+    ids = [record.get("id") for record in records]
+    
+    if hwm is None:
+        # First time we see this chat: only the latest incoming message counts,
+        # like a one-shot run; older history is marked as seen
+        latest = [record for record in records if record.get("incoming") and record.get("text")][-1:]
+        for record in records:
+            if record.get("id") and record not in latest:
+                state.mark(chat_key, record["id"])
+        return ingest_message_records(chat_key, contact_info, latest, state, handler)
+    
+    # Everything after the oldest message still remembered, filtered by the seen
+    # ids rather than sliced at hwm, so a failed message before a handled one
+    # comes round again; older history may have left the seen list
+    known = [i for i, message_id in enumerate(ids) if message_id and not state.is_new(chat_key, message_id)]
+    if known:
+        records = records[known[0] + 1:]
+    return ingest_message_records(chat_key, contact_info, records, state, handler)
+
+def watch_open_chat(driver, chat_key, contact_info, state, handler, poll_seconds, duration=None):
+    """Stream new messages of the open chat until duration runs out (or forever)"""
+    driver.set_script_timeout(max(max(WAIT_BUDGETS.values()), poll_seconds) + 5)
+    driver.execute_script(INSTALL_MESSAGE_OBSERVER_JS)
+    catch_up_chat(chat_key, contact_info, state, extract_message_records(driver), handler)
+    
+    ingested = 0
+    deadline = time.time() + duration if duration else None
+    while deadline is None or time.time() < deadline:
+        wait_ms = poll_seconds * 1000
+        if deadline:
+            wait_ms = max(0, min(wait_ms, (deadline - time.time()) * 1000))
+        
+        batch = driver.execute_async_script(DRAIN_MESSAGE_QUEUE_JS, int(wait_ms), 100)
+        if batch is None:
+            print("🔄 Page reloaded, reinstalling message observer...")
+            driver.execute_script(INSTALL_MESSAGE_OBSERVER_JS)
+            batch = extract_message_records(driver)
+        elif chat_key in state.retry:
+            # Messages the handler failed on are no longer in the observer's queue
+            ingested += catch_up_chat(chat_key, contact_info, state, extract_message_records(driver), handler)
+            continue
+        ingested += ingest_message_records(chat_key, contact_info, batch, state, handler)
+    return ingested
+
+def watch_chats(driver, contacts, poll_seconds=10, dwell_seconds=60, handler=submit_message_records):
+    """Watch mode: stream new messages from one chat, or rotate through several"""
+    state = WatchState(WATCH_STATE_PATH)
+    rotate = len(contacts) > 1
+    print(f"👀 Watching {len(contacts)} chat(s) - press Ctrl+C to stop")
+    
+    try:
+        while True:
+            for contact_name in contacts:
+                if not find_and_click_chat_improved(driver, contact_name):
+                    print(f"❌ Could not find/click chat: '{contact_name}'")
+                    continue
+                
+                contact_info = extract_contact_info(driver)
+                chat_key = normalize_name(contact_info["name"] if contact_info["name"] != "Unknown" else contact_name)
+                watch_open_chat(driver, chat_key, contact_info, state, handler, poll_seconds,
+                                dwell_seconds if rotate else None)
+                return_to_chat_list(driver)
+    except KeyboardInterrupt:
+        print("\n🛑 Watch mode stopped")
+    finally:
+        state.save()
+
+def load_contacts(contacts_arg=None, contacts_file=None):
+    """Build the list of contacts to scrape from the CLI, a file or CONTACT_NAMES"""
+    contacts = []
+    
+    if contacts_arg:
+        contacts.extend(name.strip() for name in contacts_arg.split(","))
+    
+    if contacts_file:
+        with open(contacts_file, "r", encoding="utf-8") as f:
+            if contacts_file.lower().endswith(".json"):
+                contacts.extend(str(name) for name in json.load(f))
+            else:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        contacts.append(line)
+    
+    if not contacts_arg and not contacts_file:
+        contacts.extend(CONTACT_NAMES)
+    
+    # Drop blanks and duplicates but keep the given order
+    unique_contacts = []
+    seen = set()
+    for name in contacts:
+        key = normalize_name(name)
+        if key and key not in seen:
+            seen.add(key)
+            unique_contacts.append(name.strip())
+    return unique_contacts
+
+def return_to_chat_list(driver):
+    """Close the open conversation and scroll the chat list back to the top"""
+    try:
+        ActionChains(driver).send_keys(Keys.ESCAPE).perform()
+    except Exception as e:
+        print(f"⚠️ Could not close conversation: {e}")
+    
+    try:
+        driver.execute_script(
+            "var pane = document.querySelector('#pane-side'); if (pane) { pane.scrollTop = 0; }"
+        )
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "pane-side")))
+        return True
+    except TimeoutException:
+        print("⚠️ Chat list not visible after closing conversation")
+        return False
+
+@timed("contact", ok=lambda result: result["found"] and not result["error"])
+def process_contact(driver, contact_name):
+    """Find one contact, extract its latest message and submit it"""
+    print("\n" + "-"*50)
+    print(f"👤 Processing contact: {contact_name}")
+    print("-"*50)
+    
+    result = {
+        "contact": contact_name,
+        "found": False,
+        "contact_info": None,
+        "latest_message": None,
+        "saved": False,
+        "form_submitted": False,
+        "error": None,
+        "seconds": 0.0,
+    }
+    start = time.time()
+    
+    try:
+        if not find_and_click_chat_improved(driver, contact_name):
+            print(f"❌ Could not find/click chat: '{contact_name}'")
+            result["error"] = "chat not found"
+            
+            # Debug: Save screenshot
+            safe_name = re.sub(r"[^\w-]+", "_", contact_name).strip("_") or "contact"
+            screenshot = f"debug_screenshot_{safe_name}.png"
+            driver.save_screenshot(screenshot)
+            print(f"📸 Screenshot saved as {screenshot}")
+            return result
+        
+        result["found"] = True
+        contact_info = extract_contact_info(driver)
+        latest_message = extract_latest_complaint(driver)
+        result["contact_info"] = contact_info
+        result["latest_message"] = latest_message
+        
+        result["saved"] = save_data_to_files(contact_info, latest_message)
+        # Queued in the background; resolved by run_batch once scraping is done
+        result["form_submitted"] = queue_complaint(contact_info, latest_message)
+        if result["form_submitted"] is None:
+            result["error"] = "duplicate complaint (skipped)"
+    except Exception as e:
+        print(f"❌ Error processing '{contact_name}': {e}")
+        result["error"] = str(e)
+    finally:
+        get_chat_index().save()
+        get_contact_cache().save()
+        result["seconds"] = round(time.time() - start, 2)
+    
+    return result
+
+def run_batch(driver, contacts, stop=None):
+    """Process every contact in one browser session (until the stop Event is set)"""
+    results = []
+    
+    for i, contact_name in enumerate(contacts):
+        if stop is not None and stop.is_set():
+            break
+        if i > 0:
+            return_to_chat_list(driver)
+        results.append(process_contact(driver, contact_name))
+    
+    return resolve_submissions(results)
+
+def run_unread(driver, max_chats=None, stop=None):
+    """Submit one complaint per chat that has unread messages (until the stop Event is set)"""
+    results = []
+    
+    # Chats already opened are marked read by WhatsApp, so all of them are queued even when stopping
+    for chat in extract_unread_messages(driver, max_chats, stop):
+        start = time.time()
+        message = combine_complaint_text(chat["records"])
+        result = {
+            "contact": chat["title"],
+            "found": True,
+            "contact_info": chat["contact_info"],
+            "latest_message": message,
+            "saved": False,
+            "form_submitted": False,
+            "error": None,
+            "seconds": 0.0,
+        }
+        if message:
+            result["saved"] = save_data_to_files(chat["contact_info"], message)
+            result["form_submitted"] = queue_complaint(chat["contact_info"], message)
+            if result["form_submitted"] is None:
+                result["error"] = "duplicate complaint (skipped)"
+        else:
+            result["error"] = "no unread text messages"
+        result["seconds"] = round(time.time() - start, 2)
+        results.append(result)
+    
+    get_chat_index().save()
+    return resolve_submissions(results)
+
+def print_batch_summary(results):
+    """Print per-contact results of a batch run"""
+    print("\n" + "="*50)
+    print("📊 EXTRACTION SUMMARY")
+    print("="*50)
+    
+    for result in results:
+        print(f"Contact: {result['contact']} ({result['seconds']}s)")
+        if not result["found"]:
+            print(f"   Status: FAILED ❌ ({result['error']})")
+            continue
+        
+        contact_info = result["contact_info"] or {}
+        latest_message = result["latest_message"] or ""
+        print(f"   Name: {contact_info.get('name', 'Unknown')}")
+        print(f"   Phone: {contact_info.get('phone', 'Unknown')}")
+        print(f"   Message: {latest_message[:100]}...")
+        print(f"   Google Form: {'SUBMITTED ✅' if result['form_submitted'] else 'FAILED ❌'}")
+        if result["error"]:
+            print(f"   Error: {result['error']}")
+    
+    submitted = sum(1 for result in results if result["form_submitted"])
+    print("-"*50)
+    print(f"Submitted {submitted}/{len(results)} contacts")
+    get_chat_index().print_stats()
+    get_contact_cache().print_stats()
+    get_selector_resolver().print_stats()
+    print("="*50)
+
+def load_accounts(accounts_arg):
+    """Accounts from a comma-separated list of names or a JSON file of
+    {"name", "user_data_dir", "contacts"} objects"""
+    if accounts_arg.lower().endswith(".json"):
+        with open(accounts_arg, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    else:
+        entries = [name.strip() for name in accounts_arg.split(",") if name.strip()]
+    
+    accounts = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"name": entry}
+        name = re.sub(r"[^\w-]+", "_", entry["name"]).strip("_") or f"account{len(accounts) + 1}"
+        account_dir = os.path.join(ACCOUNTS_DIR, name)
+        accounts.append({
+            "name": name,
+            "dir": account_dir,
+            "user_data_dir": os.path.abspath(entry.get("user_data_dir") or os.path.join(account_dir, "chrome-data")),
+            "contacts": [str(contact) for contact in entry.get("contacts") or []],
+        })
+    return accounts
+
+def assign_contacts(accounts, contacts):
+    """Map account name -> contacts; contacts listed under an account stay there,
+    the rest go to whichever account has the fewest so far"""
+    assignments = {account["name"]: list(account["contacts"]) for account in accounts}
+    pinned = {normalize_name(contact) for account in accounts for contact in account["contacts"]}
+    for contact in contacts:
+        if normalize_name(contact) in pinned:
+            continue
+        name = min(assignments, key=lambda account_name: len(assignments[account_name]))
+        assignments[name].append(contact)
+    return assignments
+
+def worker_settings(args):
+    """Module settings a worker process needs (spawned workers start from the defaults)"""
+    return {
+        "profile": args.profile,
+        "trim_profile": args.trim_profile or args.profile == "lean",
+        "whatsapp_url": WHATSAPP_URL,
+        "form_url": FORM_URL,
+        "form_fields": dict(FORM_FIELDS),
+        "dedup_enabled": DEDUP_ENABLED,
+        "llm_mock": LLM_MOCK,
+        "wait_budgets": dict(WAIT_BUDGETS),
+        "unread": args.unread,
+        "max_chats": args.max_chats,
+        "metrics_file": os.path.abspath(args.metrics_file) if args.metrics_file else None,
+        "profile_webdriver": args.profile_webdriver,
+    }
+
+def apply_worker_settings(settings, account_dir):
+    """Load the coordinator's settings and keep this account's files in account_dir"""
+    global WHATSAPP_URL, FORM_URL, DEDUP_ENABLED, LLM_MOCK
+    global OUTBOX_DIR, DEDUP_INDEX_PATH, CHAT_INDEX_PATH, WATCH_STATE_PATH, SELECTOR_STATS_PATH, CONTACT_CACHE_PATH
+    WHATSAPP_URL = settings["whatsapp_url"]
+    FORM_URL = settings["form_url"]
+    FORM_FIELDS.update(settings["form_fields"])
+    DEDUP_ENABLED = settings["dedup_enabled"]
+    LLM_MOCK = settings["llm_mock"]
+    WAIT_BUDGETS.update(settings["wait_budgets"])
+    
+    # chatData.json, screenshots etc. are written to the working directory
+    os.makedirs(account_dir, exist_ok=True)
+    os.chdir(account_dir)
+    OUTBOX_DIR = os.path.join(account_dir, "outbox")
+    DEDUP_INDEX_PATH = os.path.join(account_dir, "dedup-index.json")
+    CHAT_INDEX_PATH = os.path.join(account_dir, "chat-index.json")
+    WATCH_STATE_PATH = os.path.join(account_dir, "watch-state.json")
+    SELECTOR_STATS_PATH = os.path.join(account_dir, "selector-stats.json")
+    CONTACT_CACHE_PATH = os.path.join(account_dir, "contact-cache.json")
+
+def account_worker(account, task_queue, result_queue, settings):
+    """Worker process: scrape one account's contacts in its own Chrome session
+    and report every result on result_queue as soon as it is known"""
+    apply_worker_settings(settings, account["dir"])
+    name = account["name"]
+    if settings["metrics_file"]:
+        # Workers append to the same file, told apart by their account label
+        enable_metrics(settings["metrics_file"], labels={"account": name})
+    if settings["profile_webdriver"]:
+        # Each worker writes its own stacks into its account directory
+        enable_webdriver_profiler(os.path.basename(settings["profile_webdriver"]))
+    driver = None
+    queued = []
+    
+    def report(event_type, **fields):
+        result_queue.put(dict(fields, type=event_type, account=name))
+    
+    def report_result(result):
+        # Submission futures can't cross processes; their outcome follows as a "form" event
+        future = result["form_submitted"]
+        if hasattr(future, "result"):
+            queued.append(dict(result))
+            result = dict(result, form_submitted="queued")
+        report("result", **result)
+    
+    try:
+        replay_outbox()
+        if settings["trim_profile"]:
+            trim_chrome_profile(account["user_data_dir"])
+        driver = create_chrome_driver(settings["profile"], account["user_data_dir"])
+        if not driver or not open_whatsapp(driver):
+            report("error", error="WhatsApp Web did not load")
+            sys.exit(1)
+        report("ready", pid=os.getpid())
+        
+        if settings["unread"]:
+            for result in run_unread(driver, settings["max_chats"]):
+                report("result", **result)
+        else:
+            first = True
+            while True:
+                contact_name = task_queue.get()
+                if contact_name is None:
+                    break
+                if not first:
+                    return_to_chat_list(driver)
+                first = False
+                report_result(process_contact(driver, contact_name))
+        
+        for result in resolve_submissions(queued):
+            report("form", contact=result["contact"], form_submitted=result["form_submitted"], error=result["error"])
+        report("done")
+    finally:
+        close_pipeline()
+        if driver:
+            try:
+                driver.quit()
+            except Exception as e:
+                print(f"⚠️ [{name}] Error closing browser: {e}")
+
+def run_sharded(accounts, contacts, settings, results_path=None, max_restarts=SHARD_MAX_RESTARTS):
+    """Scrape with one worker process per account, merge their events into
+    results_path and restart workers that die before they are done"""
+    if not accounts:
+        print("❌ No accounts given")
+        return []
+    results_path = results_path or SHARD_RESULTS_PATH
+    accounts_by_name = {account["name"]: account for account in accounts}
+    # Contacts not reported yet; a restarted worker gets these again
+    outstanding = assign_contacts(accounts, contacts)
+    done = {name: not settings["unread"] and not outstanding[name] for name in accounts_by_name}
+    restarts = dict.fromkeys(accounts_by_name, 0)
+    results = {}
+    workers = {}
+    
+    # Resolve chromedriver once so the workers don't all download it at the same time
+    try:
+        resolve_chromedriver()
+    except Exception as e:
+        print(f"⚠️ Could not resolve ChromeDriver up front: {e}")
+    
+    context = multiprocessing.get_context("spawn")
+    result_queue = context.Queue()
+    
+    def start_worker(name):
+        task_queue = context.Queue()
+        for contact_name in outstanding[name]:
+            task_queue.put(contact_name)
+        task_queue.put(None)
+        process = context.Process(target=account_worker, name=f"account-{name}",
+                                  args=(accounts_by_name[name], task_queue, result_queue, settings))
+        process.start()
+        # The parent keeps the queue alive until the worker has unpickled it
+        workers[name] = (process, task_queue)
+        print(f"🧵 Worker '{name}' started (pid {process.pid}) with {len(outstanding[name])} contact(s)")
+    
+    def handle(event, output):
+        output.write(json.dumps(event, ensure_ascii=False) + "\n")
+        output.flush()
+        name = event["account"]
+        if event["type"] == "result":
+            if event["contact"] in outstanding[name]:
+                outstanding[name].remove(event["contact"])
+            results[(name, event["contact"])] = event
+            print(f"📥 [{name}] {event['contact']}: {'found' if event['found'] else event['error']}")
+        elif event["type"] == "form":
+            result = results.get((name, event["contact"]))
+            if result:
+                result["form_submitted"] = event["form_submitted"]
+                result["error"] = result["error"] or event["error"]
+        elif event["type"] == "done":
+            done[name] = True
+        elif event["type"] == "error":
+            print(f"⚠️ [{name}] {event['error']}")
+    
+    def drain(output, timeout):
+        try:
+            while True:
+                handle(result_queue.get(timeout=timeout), output)
+                timeout = 0.2
+        except queue.Empty:
+            pass
+    
+    start = time.time()
+    with open(results_path, "a", encoding="utf-8") as output:
+        for name in accounts_by_name:
+            if not done[name]:
+                start_worker(name)
+        
+        while workers:
+            drain(output, 1.0)
+            for name, (process, _) in list(workers.items()):
+                if process.is_alive():
+                    continue
+                process.join()
+                # Events a worker sent just before exiting may still be in flight
+                drain(output, 0.5)
+                del workers[name]
+                if done[name]:
+                    continue
+                
+                if restarts[name] < max_restarts:
+                    restarts[name] += 1
+                    print(f"♻️ Worker '{name}' exited with code {process.exitcode} - "
+                          f"restarting ({restarts[name]}/{max_restarts})")
+                    start_worker(name)
+                    continue
+                
+                print(f"❌ Worker '{name}' keeps failing, giving up on its {len(outstanding[name])} contact(s)")
+                for contact_name in list(outstanding[name]):
+                    handle({"type": "result", "account": name, "contact": contact_name, "found": False,
+                            "contact_info": None, "latest_message": None, "saved": False,
+                            "form_submitted": False, "error": f"worker for '{name}' died", "seconds": 0.0}, output)
+    
+    elapsed = time.time() - start
+    print(f"🧵 {len(accounts)} worker(s) handled {len(results)} chat(s) in {elapsed:.1f}s; merged results in {results_path}")
+    return list(results.values())
+
+class ChromeSession:
+    """The daemon's Chrome/WhatsApp session, restarted on the same chrome-data
+    after max_operations chats, once the browser uses max_rss_mb, or when it stops responding"""
+    
+    def __init__(self, profile, user_data_dir=None, trim=False,
+                 max_operations=DAEMON_RECYCLE_OPERATIONS, max_rss_mb=DAEMON_RECYCLE_RSS_MB):
+        self.profile = profile
+        self.user_data_dir = user_data_dir
+        self.trim = trim
+        self.max_operations = max_operations
+        self.max_rss_mb = max_rss_mb
+        self.driver = None
+        self.operations = 0
+        self.recycles = 0
+        self.rss_mb = None
+    
+    def recycle_reason(self):
+        """Why the running browser should be restarted, or None"""
+        if self.max_operations and self.operations >= self.max_operations:
+            return f"{self.operations} operations"
+        self.rss_mb = browser_rss_mb(self.driver)
+        if self.max_rss_mb and self.rss_mb is not None and self.rss_mb >= self.max_rss_mb:
+            return f"browser RSS {self.rss_mb:.0f} MB"
+        try:
+            self.driver.execute_script("return 1")
+        except Exception as e:
+            return f"browser not responding ({type(e).__name__})"
+        return None
+    
+    def get(self):
+        """A driver with WhatsApp Web loaded, or None if it could not be started"""
+        if self.driver is not None:
+            reason = self.recycle_reason()
+            if reason:
+                self.recycle(reason)
+        if self.driver is None:
+            self.start()
+        return self.driver
+    
+    def start(self):
+        if self.trim:
+            trim_chrome_profile(self.user_data_dir)
+        driver = create_chrome_driver(self.profile, self.user_data_dir)
+        if not driver:
+            return None
+        if not open_whatsapp(driver):
+            print("❌ Failed to load WhatsApp Web")
+            self.driver = driver
+            self.quit()
+            return None
+        self.driver = driver
+        self.operations = 0
+        self.rss_mb = browser_rss_mb(driver)
+        return driver
+    
+    def recycle(self, reason):
+        print(f"♻️ Restarting Chrome: {reason}")
+        count("driver_recycles_total")
+        self.recycles += 1
+        self.quit()
+    
+    def quit(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception as e:
+                print(f"⚠️ Error closing browser: {e}")
+            self.driver = None
+
+class DaemonHealth:
+    """Daemon status, written to path after every cycle and served on /health"""
+    
+    def __init__(self, interval, path=DAEMON_HEALTH_PATH):
+        self.interval = interval
+        self.path = path
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.status = {
+            "pid": os.getpid(),
+            "cycles": 0,
+            "failed_cycles": 0,
+            "consecutive_failures": 0,
+            "chats": 0,
+            "last_cycle_at": None,
+            "last_cycle_seconds": None,
+            "last_ok_at": None,
+            "last_error": None,
+            "driver_operations": 0,
+            "driver_recycles": 0,
+            "browser_rss_mb": None,
+            "stopping": False,
+        }
+    
+    def record_cycle(self, seconds, chats, error, session):
+        now = time.time()
+        with self.lock:
+            status = self.status
+            status["cycles"] += 1
+            status["chats"] += chats
+            status["last_cycle_at"] = now
+            status["last_cycle_seconds"] = round(seconds, 2)
+            status["last_error"] = error
+            if error:
+                status["failed_cycles"] += 1
+                status["consecutive_failures"] += 1
+            else:
+                status["consecutive_failures"] = 0
+                status["last_ok_at"] = now
+            status["driver_operations"] = session.operations
+            status["driver_recycles"] = session.recycles
+            status["browser_rss_mb"] = round(session.rss_mb, 1) if session.rss_mb is not None else None
+        count("daemon_cycles_total", result="failed" if error else "ok")
+        self.write()
+    
+    def stopping(self):
+        with self.lock:
+            self.status["stopping"] = True
+        self.write()
+    
+    def snapshot(self):
+        with self.lock:
+            status = dict(self.status)
+        now = time.time()
+        # A long cycle may overrun the interval; allow for the last one's length
+        stale_after = DAEMON_STALE_INTERVALS * max(self.interval, status["last_cycle_seconds"] or 0)
+        rss = own_rss_mb()
+        status.update({
+            "healthy": not status["stopping"] and now - (status["last_ok_at"] or self.started_at) <= stale_after,
+            "uptime_seconds": round(now - self.started_at),
+            "rss_mb": round(rss, 1) if rss is not None else None,
+            "queue_depth": _form_submitter.queue_depth() if _form_submitter is not None else 0,
+        })
+        return status
+    
+    def write(self):
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not write daemon health: {e}")
+
+class DaemonHealthHandler(BaseHTTPRequestHandler):
+    """GET /health: the daemon's status, 200 while healthy and 503 otherwise"""
+    
+    def do_GET(self):
+        if self.path.split("?", 1)[0].rstrip("/") != "/health":
+            self.send_error(404)
+            return
+        status = self.server.health.snapshot()
+        body = json.dumps(status, ensure_ascii=False).encode("utf-8")
+        self.send_response(200 if status["healthy"] else 503)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+def serve_daemon_health(health, port, host=DAEMON_HEALTH_HOST):
+    server = ThreadingHTTPServer((host, port), DaemonHealthHandler)
+    server.daemon_threads = True
+    server.health = health
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🩺 Health check on http://{host}:{server.server_address[1]}/health")
+    return server
+
+def install_stop_handlers(stop):
+    """SIGTERM/SIGINT set stop, so the daemon finishes the current chat and
+    drains its submissions; a second signal stops at once"""
+    def handle(signum, frame):
+        if stop.is_set():
+            raise KeyboardInterrupt
+        print(f"\n🛑 {signal.Signals(signum).name} received - finishing the current chat, then shutting down")
+        stop.set()
+    
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, handle)
+
+def run_daemon(args, contacts, stop=None):
+    """Service mode: scrape every args.interval seconds without prompts until
+    SIGTERM/SIGINT, recycling Chrome as it grows"""
+    stop = stop or threading.Event()
+    install_stop_handlers(stop)
+    health = DaemonHealth(args.interval)
+    server = serve_daemon_health(health, args.health_port) if args.health_port is not None else None
+    session = ChromeSession(args.profile, trim=args.trim_profile or args.profile == "lean",
+                            max_operations=args.recycle_after, max_rss_mb=args.recycle_rss_mb)
+    target = "unread chats" if args.unread else f"{len(contacts)} contact(s)"
+    print(f"🛎️ Daemon started (pid {os.getpid()}): {target} every {args.interval:g}s")
+    
+    try:
+        while not stop.is_set():
+            start = time.time()
+            chats, error = 0, None
+            try:
+                # Complaints whose submission failed go out again once nothing else is in flight
+                if health.status["cycles"] and (_form_submitter is None or _form_submitter.queue_depth() == 0):
+                    replay_outbox()
+                driver = session.get()
+                if driver is None:
+                    error = "Chrome or WhatsApp Web did not start"
+                else:
+                    if args.unread:
+                        results = run_unread(driver, args.max_chats, stop)
+                    else:
+                        results = run_batch(driver, contacts, stop)
+                        return_to_chat_list(driver)
+                    chats = len(results)
+                    session.operations += chats + 1
+                    submitted = sum(1 for result in results if result["form_submitted"])
+                    failed = sum(1 for result in results if not result["found"])
+                    print(f"🔁 Cycle {health.status['cycles'] + 1}: {chats} chat(s), {submitted} submitted, "
+                          f"{failed} not found in {time.time() - start:.1f}s")
+                get_contact_cache().save()
+                get_selector_resolver().save()
+                if DEDUP_ENABLED:
+                    get_deduplicator().save()
+            except Exception as e:
+                error = str(e)
+                print(f"❌ Daemon cycle failed: {e}")
+                if session.driver is not None:
+                    session.recycle("cycle failed")
+            health.record_cycle(time.time() - start, chats, error, session)
+            stop.wait(max(0, args.interval - (time.time() - start)))
+    finally:
+        health.stopping()
+        session.quit()
+        if server is not None:
+            server.shutdown()
+    print("🛑 Daemon stopped")
+
+def build_arg_parser():
+    """Command line options"""
+    parser = argparse.ArgumentParser(description="WhatsApp Web complaint scraper")
+    parser.add_argument("--contacts", help="Comma-separated contact names to scrape")
+    parser.add_argument("--contacts-file", help="File with one contact name per line (or a JSON list)")
+    parser.add_argument("--refresh-driver", action="store_true", help="Clear the cached ChromeDriver before starting")
+    parser.add_argument("--profile", choices=CHROME_PROFILES, default="default",
+                        help="Browser profile: full headed Chrome or lean headless Chrome")
+    parser.add_argument("--trim-profile", action="store_true", help="Delete cache folders from chrome-data before starting")
+    parser.add_argument("--wait-budget", action="append", metavar="PHASE=SECONDS",
+                        help=f"Override a wait budget ({', '.join(WAIT_BUDGETS)})")
+    parser.add_argument("--unread", action="store_true",
+                        help="Submit every chat with unread messages instead of named contacts")
+    parser.add_argument("--max-chats", type=int, help="Limit how many unread chats are opened")
+    parser.add_argument("--form-url", help="Google Form formResponse URL (overrides FORM_URL)")
+    parser.add_argument("--stub-form", action="store_true", help="Submit to a local stub form instead of Google")
+    parser.add_argument("--bench-submitter", type=int, metavar="N",
+                        help="Submit N fake complaints to the stub form and print submitter metrics")
+    parser.add_argument("--no-dedup", action="store_true", help="Submit near-duplicate complaints too")
+    parser.add_argument("--bench-extractor", action="store_true",
+                        help="Benchmark local complaint field extraction against the LLM path")
+    parser.add_argument("--mock-llm", action="store_true", help="Use the deterministic mock model instead of OpenRouter")
+    parser.add_argument("--bench-llm-stage", action="store_true",
+                        help="Burst-load the cached/batched LLM stage with the mock model")
+    parser.add_argument("--watch", action="store_true", help="Keep running and ingest new messages as they arrive")
+    parser.add_argument("--watch-poll", type=float, default=10, help="Seconds per long-poll for new messages")
+    parser.add_argument("--watch-dwell", type=float, default=60,
+                        help="Seconds to stay on each chat when watching several contacts")
+    parser.add_argument("--accounts",
+                        help="Run one worker process per account: comma-separated names or a JSON accounts file")
+    parser.add_argument("--results-file", help=f"Merged worker results for --accounts (default {SHARD_RESULTS_PATH})")
+    parser.add_argument("--fake-whatsapp", action="store_true", help="Scrape a local fake WhatsApp Web page")
+    parser.add_argument("--fake-chats", type=int, default=200, help="Number of chats on the fake page")
+    parser.add_argument("--fake-messages", type=int, default=20, help="Messages per chat on the fake page")
+    parser.add_argument("--bench-scraper", action="store_true",
+                        help="Benchmark chat lookup and extraction against the fake WhatsApp page")
+    parser.add_argument("--bench-sizes", default=",".join(str(size) for size in BENCH_SIZES),
+                        help="Comma-separated chat list sizes for --bench-scraper")
+    parser.add_argument("--bench-repeats", type=int, default=3, help="Runs per case for --bench-scraper")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help=f"Overwrite {os.path.basename(BENCH_BASELINE_PATH)} with this --bench-scraper run")
+    parser.add_argument("--ingest-port", type=int,
+                        help="Serve queued complaints to local consumers (pull, NDJSON and SSE) on this port")
+    parser.add_argument("--ingest-host", default=INGEST_HOST,
+                        help="Interface for --ingest-port (0.0.0.0 when n8n runs in a container)")
+    parser.add_argument("--query", action="store_true", help="Search the local complaint store and exit")
+    parser.add_argument("--search", help="--query: words that must all appear in the problem text")
+    parser.add_argument("--phone", help="--query: complaints from this phone number")
+    parser.add_argument("--contact", help="--query: complaints from this WhatsApp chat")
+    parser.add_argument("--since", type=parse_since, help="--query: from this long ago (12h, 7d, 2w, today) or date (YYYY-MM-DD)")
+    parser.add_argument("--until", type=parse_since, help="--query: before this time (same formats as --since)")
+    parser.add_argument("--group-by", choices=("day", "contact", "phone"), help="--query: count complaints instead")
+    parser.add_argument("--limit", type=int, default=50, help="--query: maximum rows")
+    parser.add_argument("--metrics-file", help="Append timing spans and counters to this JSON-lines file")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port (localhost)")
+    parser.add_argument("--profile-webdriver", metavar="PATH",
+                        help="Record every WebDriver command by caller; write collapsed stacks for flamegraphs to PATH")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Run unattended: scrape every --interval seconds until SIGTERM/SIGINT")
+    parser.add_argument("--interval", type=float, default=DAEMON_INTERVAL_SECONDS, help="--daemon: seconds between cycles")
+    parser.add_argument("--health-port", type=int, help="--daemon: serve GET /health on this port (localhost)")
+    parser.add_argument("--recycle-after", type=int, default=DAEMON_RECYCLE_OPERATIONS,
+                        help="--daemon: restart Chrome after this many chats (0 = never)")
+    parser.add_argument("--recycle-rss-mb", type=float, default=DAEMON_RECYCLE_RSS_MB,
+                        help="--daemon: restart Chrome once its memory passes this many MB (0 = never)")
+    return parser
+
+def main(argv=None):
+    global FORM_URL, DEDUP_ENABLED, LLM_MOCK, WHATSAPP_URL
+    args = build_arg_parser().parse_args(argv)
+    parse_wait_budgets(args.wait_budget)
+    driver = None
+    
+    if args.query:
+        run_store_query(args)
+        return
+    if args.bench_submitter:
+        benchmark_submitter(args.bench_submitter)
+        return
+    if args.mock_llm:
+        LLM_MOCK = True
+    if args.bench_extractor:
+        benchmark_extractor()
+        close_llm_stage()
+        return
+    if args.bench_llm_stage:
+        benchmark_llm_stage()
+        return
+    if args.profile_webdriver and not args.accounts:
+        # With --accounts the workers profile their own drivers
+        enable_webdriver_profiler(args.profile_webdriver)
+    if args.bench_scraper:
+        sizes = [int(size) for size in args.bench_sizes.split(",") if size.strip()]
+        ok = benchmark_scraper(sizes, args.fake_messages, args.bench_repeats, args.profile, args.update_baseline)
+        close_webdriver_profiler()
+        sys.exit(0 if ok else 1)
+    if args.form_url:
+        FORM_URL = args.form_url
+    if args.stub_form:
+        use_stub_form()
+    if args.no_dedup:
+        DEDUP_ENABLED = False
+    if args.fake_whatsapp:
+        _, WHATSAPP_URL = start_fake_whatsapp_server(args.fake_chats, args.fake_messages)
+    if args.metrics_file or args.metrics_port is not None:
+        enable_metrics(args.metrics_file, args.metrics_port)
+    if args.ingest_port is not None:
+        if args.accounts:
+            print("⚠️ --ingest-port is not available with --accounts; workers keep their own outbox")
+        else:
+            enable_ingest(args.ingest_port, args.ingest_host)
+    
+    try:
+        contacts = load_contacts(args.contacts, args.contacts_file)
+        if not contacts and not args.unread and not args.accounts:
+            print("❌ No contacts given - set CONTACT_NAMES or pass --contacts / --contacts-file")
+            return
+        if args.watch and not contacts:
+            print("❌ --watch needs contacts to watch - set CONTACT_NAMES or pass --contacts / --contacts-file")
+            return
+        
+        # Pending complaints from earlier runs go out while Chrome starts
+        if not args.accounts:
+            replay_outbox()
+        
+        print("🚀 Starting enhanced WhatsApp scraper with ChromeDriver fixes...")
+        if contacts:
+            print(f"👥 {len(contacts)} contact(s) to process")
+        
+        # Fix ChromeDriver issues first
+        if args.refresh_driver:
+            clear_chromedriver_cache()
+        fix_chromedriver_issues()
+        
+        if args.daemon and not args.accounts:
+            run_daemon(args, contacts)
+            return
+        
+        if args.accounts:
+            if args.daemon:
+                print("⚠️ --daemon is not available with --accounts; running the accounts once")
+            results = run_sharded(load_accounts(args.accounts), contacts, worker_settings(args), args.results_file)
+            print_batch_summary(results)
+            return
+        
+        if args.trim_profile or args.profile == "lean":
+            trim_chrome_profile()
+        
+        # Create driver with multiple fallback methods
+        startup_start = time.time()
+        driver = create_chrome_driver(args.profile)
+        
+        if not driver:
+            print("❌ Could not create Chrome driver with any method")
+            print("\n🔧 Manual fix suggestions:")
+            print("1. Update Chrome browser to latest version")
+            print("2. Run: pip install --upgrade selenium webdriver-manager")
+            print("3. Clear ChromeDriver cache: Delete ~/.wdm folder")
+            print("4. Download ChromeDriver manually from https://chromedriver.chromium.org/")
+            print("5. Restart your terminal/command prompt")
+            return
+        
+        if not open_whatsapp(driver):
+            print("❌ Failed to load WhatsApp Web")
+            return
+        report_profile_resources(driver, args.profile, time.time() - startup_start)
+        
+        if args.watch:
+            watch_chats(driver, contacts, args.watch_poll, args.watch_dwell)
+            print_wait_report()
+            return
+        
+        if args.unread:
+            results = run_unread(driver, args.max_chats)
+        else:
+            results = run_batch(driver, contacts)
+        print_batch_summary(results)
+        print_wait_report()
+        
+        print("✅ Done!")
+        
+        if not sys.stdin.isatty():
+            # Started by a scheduler or service manager - nobody to press Enter
+            pass
+        elif any(not result["found"] for result in results):
+            # Keep browser open for manual inspection
+            input("❓ Press Enter to close browser (check it manually first)...")
+        else:
+            # Optional: keep browser open
+            input("Press Enter to close browser...")
         
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
@@ -579,6 +5055,7 @@ def main():
         print("4. Try: pip uninstall selenium webdriver-manager && pip install selenium webdriver-manager")
         
     finally:
+        close_pipeline()
         if driver:
             try:
                 print("🔄 Closing browser...")